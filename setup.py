@@ -38,9 +38,14 @@ setup(
 
     python_requires='>=3.7',
     install_requires=[
+        'asgiref>=3.3',
         'django',
         'pyquerystring',
     ],
+    extras_require={
+        'excel': ['openpyxl>=2.4'],
+        'orjson': ['orjson>=3'],
+    },
     include_package_data=True,
     zip_safe=False,
     classifiers=[
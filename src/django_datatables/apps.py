@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class DatatablesConfig(AppConfig):
+    name = 'django_datatables'
+
+    def ready(self):
+        # Register the tables declared in the datatables module of every
+        # app, so the data view can serve them before they are imported
+        autodiscover_modules('datatables')
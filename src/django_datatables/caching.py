@@ -0,0 +1,126 @@
+"""
+Server side cache of datatable responses
+
+Cached responses are keyed by the parsed request parameters and by a
+generation counter for each model the table depends on.  Saving or
+deleting an instance of one of those models bumps its counter, which
+retires every cached response built from it in a single cache operation.
+Updates that bypass signals (QuerySet.update(), bulk_create(), raw SQL)
+are only picked up when the entries expire.
+"""
+
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+
+from .compat import ASYNC_CACHE
+
+GENERATION_KEY = 'django_datatables:generation:{0}'
+RESPONSE_KEY = 'django_datatables:response:{0}:{1}'
+
+
+def model_label(model):
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.label_lower
+
+
+def bump_generation(cache, label):
+    key = GENERATION_KEY.format(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Start from the clock so an evicted counter never reuses an old value
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def watch_models(models, alias='default'):
+    """
+    Bump a model's generation when one of its instances is saved or deleted.
+    Models may be given as classes or "app_label.ModelName" strings.
+    """
+    for model in models:
+        label = model_label(model)
+
+        def receiver(sender, label=label, **kwargs):
+            bump_generation(caches[alias], label)
+
+        for signal in (post_save, post_delete):
+            signal.connect(
+                receiver, sender=model, weak=False,
+                dispatch_uid='django_datatables:{0}:{1}'.format(alias, label),
+            )
+
+
+def get_generations(cache, models):
+    keys = [GENERATION_KEY.format(model_label(model)) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # A missing counter must not match responses cached before it was lost
+            cache.add(key, int(time.time() * 1000), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_cache_models(meta):
+    """ Returns the models whose changes invalidate a table's cache """
+    models = list(meta.get('cache_models', []))
+    if meta.get('model'):
+        models.insert(0, meta.model)
+    return models
+
+
+def get_cache_key(datatable, request, cache):
+    signature = repr((
+        datatable.params.signature(),
+        get_generations(cache, get_cache_models(datatable._meta)),
+        datatable.get_cache_key_extra(request),
+    ))
+    return RESPONSE_KEY.format(
+        datatable._meta.datatable_id,
+        hashlib.sha1(signature.encode('utf-8')).hexdigest(),
+    )
+
+
+def is_successful(json_response):
+    """ Whether a context holds a served draw, rather than an error or a superseded draw """
+    return (isinstance(json_response, dict) and 'error' not in json_response
+            and 'superseded' not in json_response)
+
+
+def get_cached_context_data(datatable, request):
+    """
+    Returns get_context_data() from the cache, computing it on a miss.
+    Responses with errors, or of superseded draws, are not cached.
+    """
+    cache = caches[datatable._meta.get('cache_alias', 'default')]
+    key = get_cache_key(datatable, request, cache)
+    json_response = cache.get(key)
+    if json_response is None:
+        json_response = datatable.get_context_data(request)
+        if is_successful(json_response):
+            cache.set(key, json_response, datatable._meta.get('cache_timeout', 60))
+    else:
+        # draw is not part of the key, echo the one that was asked for
+        json_response['draw'] = datatable.params.draw
+    return json_response
+
+
+async def aget_cached_context_data(datatable, request):
+    """ The async counterpart of get_cached_context_data """
+    cache = caches[datatable._meta.get('cache_alias', 'default')]
+    key = await sync_to_async(get_cache_key)(datatable, request, cache)
+    cache_get = cache.aget if ASYNC_CACHE else sync_to_async(cache.get)
+    cache_set = cache.aset if ASYNC_CACHE else sync_to_async(cache.set)
+    json_response = await cache_get(key)
+    if json_response is None:
+        json_response = await datatable.aget_context_data(request)
+        if is_successful(json_response):
+            await cache_set(key, json_response, datatable._meta.get('cache_timeout', 60))
+    else:
+        json_response['draw'] = datatable.params.draw
+    return json_response
@@ -0,0 +1,191 @@
+"""
+Superseded draws and statement timeouts
+
+While a user types in the search box DataTables sends a draw per
+keystroke, and only shows the newest one.  With Meta.supersede_draws, the
+draws in flight are tracked per session, table and client in this
+process; a draw with a higher draw counter supersedes the older ones.
+The client is an id the table's javascript sends with every draw, as
+draw counters start again from 1 on every page load: only the draws of
+the same page are compared.  Superseded draws:
+
+* their queries that have not started yet are not run
+* their running queries are cancelled, with a progress handler on SQLite
+  and the driver's cancel() (PQcancel, as pg_cancel_backend) on
+  PostgreSQL; on other databases they run to completion
+
+A superseded draw is answered with an empty response flagged
+"superseded", which DataTables discards as out of date.  Draws served by
+other processes do not see each other, and requests without a session
+or a client id are not tracked.
+
+Meta.statement_timeout (milliseconds) bounds each count and page query of
+a draw, with statement_timeout on PostgreSQL and a progress handler on
+SQLite.  A query over the timeout fails the draw with StatementTimeout.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+from django.db import DatabaseError, connections
+
+# Virtual machine instructions between two SQLite progress handler calls
+SQLITE_PROGRESS_STEPS = 1000
+
+_draws = {}
+_draws_lock = threading.Lock()
+
+
+class DrawSuperseded(Exception):
+    """ A newer draw of the same table was requested from the same session """
+
+
+class StatementTimeout(DatabaseError):
+    """ A query of a draw ran longer than Meta.statement_timeout """
+
+
+class NullDrawGuard(object):
+    """ Runs the queries of a draw as they are """
+    enabled = False
+    superseded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def check(self):
+        pass
+
+    def wrap(self, fn, using):
+        return fn
+
+
+class DrawGuard(NullDrawGuard):
+    """
+    Tracks a draw while it runs (use as a context manager) and guards the
+    queries it runs with wrap().
+    """
+    enabled = True
+
+    def __init__(self, key, draw, timeout=None):
+        self.key = key
+        self.draw = draw
+        self.timeout = timeout
+        self.superseded = False
+        # The connections running a query, cancelled from other threads
+        self.running = set()
+        self.running_lock = threading.Lock()
+
+    def __enter__(self):
+        if self.key is not None:
+            register(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.key is not None:
+            unregister(self)
+        return False
+
+    def cancel(self):
+        """ Marks the draw superseded and cancels its running queries, from any thread """
+        self.superseded = True
+        # Held while cancelling, so a connection is not reused by another query meanwhile
+        with self.running_lock:
+            for connection in self.running:
+                cancel = getattr(connection.connection, 'cancel', None)
+                if connection.vendor == 'postgresql' and cancel is not None:
+                    cancel()
+
+    def check(self):
+        if self.superseded:
+            raise DrawSuperseded()
+
+    def wrap(self, fn, using):
+        """ Returns fn, not run once the draw is superseded, run under guard() """
+        def run(*args, **kwargs):
+            self.check()
+            start = time.monotonic()
+            try:
+                with self.guard(connections[using], start):
+                    return fn(*args, **kwargs)
+            except DatabaseError as e:
+                self.check()
+                if self.timeout and (time.monotonic() - start) * 1000 >= self.timeout:
+                    raise StatementTimeout(str(e)) from e
+                raise
+        return run
+
+    @contextmanager
+    def guard(self, connection, start):
+        """ Applies the statement timeout, and allows the queries run to be cancelled """
+        connection.ensure_connection()
+        if connection.vendor == 'sqlite':
+            deadline = start + self.timeout / 1000 if self.timeout else None
+
+            def progress():
+                # A non zero return interrupts the query
+                return self.superseded or (
+                    deadline is not None and time.monotonic() > deadline)
+
+            connection.connection.set_progress_handler(progress, SQLITE_PROGRESS_STEPS)
+            try:
+                yield
+            finally:
+                connection.connection.set_progress_handler(None, 0)
+        elif connection.vendor == 'postgresql':
+            in_atomic_block = connection.in_atomic_block
+            if self.timeout:
+                with connection.cursor() as cursor:
+                    # SET LOCAL ends with the transaction, which may be aborted by then
+                    cursor.execute('SET {0}statement_timeout = %s'.format(
+                        'LOCAL ' if in_atomic_block else ''), [int(self.timeout)])
+            with self.running_lock:
+                self.running.add(connection)
+            try:
+                yield
+            finally:
+                with self.running_lock:
+                    self.running.discard(connection)
+                if self.timeout and not in_atomic_block:
+                    with connection.cursor() as cursor:
+                        cursor.execute('RESET statement_timeout')
+        else:
+            yield
+
+
+def register(guard):
+    """ Adds a draw in flight, superseding the older draws of its key """
+    with _draws_lock:
+        others = _draws.setdefault(guard.key, [])
+        superseded = [other for other in others if other.draw < guard.draw]
+        if any(other.draw > guard.draw for other in others):
+            guard.superseded = True
+        others.append(guard)
+    for other in superseded:
+        other.cancel()
+
+
+def unregister(guard):
+    with _draws_lock:
+        others = _draws.get(guard.key, [])
+        if guard in others:
+            others.remove(guard)
+        if not others:
+            _draws.pop(guard.key, None)
+
+
+def get_draw_guard(datatable, request):
+    """ Returns the DrawGuard of a draw, or a NullDrawGuard when disabled """
+    supersede = datatable._meta.get('supersede_draws', False)
+    timeout = datatable._meta.get('statement_timeout')
+    if not supersede and not timeout:
+        return NullDrawGuard()
+    key = None
+    session = getattr(request, 'session', None)
+    client = datatable.params.client
+    if supersede and client and session is not None and session.session_key:
+        key = (session.session_key, datatable._meta.datatable_id, client)
+    return DrawGuard(key, datatable.params.draw, timeout)
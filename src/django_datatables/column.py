@@ -2,7 +2,29 @@
 Column classes
 """
 
-from django.urls import reverse
+from functools import lru_cache
+from operator import itemgetter
+
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
+from django.utils.html import escape, format_html, format_html_join
+
+from .links import link_url
+
+
+def _parse_date(value):
+    """ Returns the date in a Y-m-d string, or None """
+    try:
+        return parse_date(value.strip())
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def format_date(value):
+    """ Returns a date in Y-m-d format, shared by the date columns of every table """
+    return value.strftime("%Y-%m-%d").upper()
 
 
 class Column(object):
@@ -10,12 +32,21 @@ class Column(object):
     # Tracks each time a Field instance is created. Used to retain order.
     creation_counter = 0
 
-    def __init__(self, title=None, css_class=None, value=None, link=None, link_args=None):
+    # Lookup used to filter on the column's search value, None to disable
+    search_lookup = None
+
+    def __init__(self, title=None, css_class=None, value=None, link=None, link_args=None,
+                 search_lookup=None, choices=None, search_min_length=0, search_debounce=None):
         self.title = title
         self.value = value
         self.link = link
         self.css_class = css_class
         self.link_args = link_args or []
+        if search_lookup is not None:
+            self.search_lookup = search_lookup
+        self.choices = choices
+        self.search_min_length = search_min_length
+        self.search_debounce = search_debounce
 
         # Increase the creation counter, and save our local copy.
         self.creation_counter = Column.creation_counter
@@ -33,6 +64,28 @@ class Column(object):
         """
         return value
 
+    def render_batch(self, values, rows):
+        """
+        Returns the rendered values of the column for a page of rows at
+        once, the values in the same order as the rows.  Override to
+        render in bulk; by default render_column and
+        render_column_using_values are called for each value.
+        """
+        render_column = self.render_column
+        render_column_using_values = self.render_column_using_values
+        return [
+            render_column_using_values(render_column(value), row)
+            for value, row in zip(values, rows)
+        ]
+
+    def render_export(self, value, values_dict):
+        """
+        Returns the value written to exports.  Links are not rendered in
+        exports, and by default the value is exported as it was read, eg:
+        dates stay dates.
+        """
+        return value
+
     def get_referenced_values(self):
         """ Returns a list of values that will need to be referenced """
         values = []
@@ -45,29 +98,84 @@ class Column(object):
             values.append(self.value)
         return values
 
-    def render_link(self, value, values_dict):
+    @cached_property
+    def link_arg_getters(self):
         """
-        Returns value wrapped in link tag as specified by link
+        One callable per link arg, returning it from the values dict: a
+        column, a fixed string (#), or a class attribute (.)
         """
-        def get_link_val(key):
-            """ Gets a link by column, fixed string (#), or class attribute (.)"""
+        getters = []
+        for key in self.link_args:
             if key.startswith("#"):
-                return key[1:]
+                getters.append(lambda values_dict, constant=key[1:]: constant)
             elif key.startswith("."):
-                return getattr(self, key[1:])
-            return values_dict[key]
+                getters.append(
+                    lambda values_dict, attribute=key[1:]: getattr(self, attribute))
+            else:
+                getters.append(itemgetter(key))
+        return getters
 
-        reverse_args = [get_link_val(key) for key in self.link_args]
-        link = reverse(self.link, args=reverse_args)
-        return '<a href="{link}">{val}</a>'.format(link=link, val=value)
+    def render_link(self, value, values_dict):
+        """
+        Returns value wrapped in link tag as specified by link
+        """
+        link = link_url(self.link, [get(values_dict) for get in self.link_arg_getters])
+        return '<a href="{link}">{val}</a>'.format(link=escape(link), val=value)
 
     def has_link(self):
         """ Returns True if column has link property set """
         return self.link is not None
 
+    @property
+    def searchable(self):
+        """ Returns True if the column can be filtered by its own search value """
+        return bool(self.search_lookup) or self.choices is not None
+
+    def get_search_filter(self, key, value):
+        """
+        Returns a Q filtering the column by its search value, or None to
+        ignore the value.  Choices are matched exactly, anything else with
+        search_lookup.
+        """
+        if len(value) < self.search_min_length:
+            return None
+        if self.choices is not None:
+            if value not in [str(choice) for choice, label in self.choices]:
+                return None
+            return Q(**{key: value})
+        if not self.search_lookup:
+            return None
+        return Q(**{'{0}__{1}'.format(key, self.search_lookup): value})
+
+    def get_search_key(self, key, qs):
+        """
+        Returns the field path filtered by the column's search value, given
+        the field path or annotation of the column in qs.
+        """
+        return key
+
+    def render_search_input(self, index):
+        """
+        Returns the html of the input filtering the column in the column search row
+        """
+        attrs = format_html(
+            'class="form-control input-sm" data-column="{}" data-min-length="{}" data-debounce="{}"',
+            index, self.search_min_length, self.search_debounce or 0)
+        if self.choices is not None:
+            options = format_html_join(
+                '', '<option value="{}">{}</option>', [(c, label) for c, label in self.choices])
+            return format_html('<select {}><option value=""></option>{}</select>', attrs, options)
+        return format_html('<input type="search" {}>', attrs)
+
 
 class TextColumn(Column):
-    pass
+    """
+    Searched by prefix, case insensitively.  On PostgreSQL the search can
+    use an expression index, eg: OpClass(Upper('last_name'),
+    name='text_pattern_ops'); a plain text_pattern_ops index only serves
+    search_lookup='startswith', for case sensitive columns.
+    """
+    search_lookup = 'istartswith'
 
 
 class CheckBoxColumn(Column):
@@ -84,6 +192,9 @@ class CheckBoxColumn(Column):
             value=values_dict[self.value],
         )
 
+    def render_export(self, value, values_dict):
+        return None
+
 
 class GlyphiconColumn(Column):
 
@@ -95,6 +206,12 @@ class GlyphiconColumn(Column):
     def render_column(self, value):
         return "<span class='glyphicon glyphicon-{}'></span>".format(self.icon)
 
+    def render_batch(self, values, rows):
+        return [self.render_column(None)] * len(values)
+
+    def render_export(self, value, values_dict):
+        return None
+
 
 class FontAwesome4Column(Column):
 
@@ -108,6 +225,12 @@ class FontAwesome4Column(Column):
     def render_column(self, value):
         return """<i class="fa fa-{}" aria-hidden="true"></i>""".format(self.icon)
 
+    def render_batch(self, values, rows):
+        return [self.render_column(None)] * len(values)
+
+    def render_export(self, value, values_dict):
+        return None
+
 
 class FontAwesome5Column(Column):
 
@@ -119,6 +242,12 @@ class FontAwesome5Column(Column):
     def render_column(self, value):
         return """<i class="{}"></i>""".format(self.icon)
 
+    def render_batch(self, values, rows):
+        return [self.render_column(None)] * len(values)
+
+    def render_export(self, value, values_dict):
+        return None
+
 
 class BulletedListColumn(Column):
 
@@ -131,6 +260,10 @@ class BulletedListColumn(Column):
             </ul>
         """
 
+    def render_export(self, value, values_dict):
+        # Lists are written one item per line
+        return value
+
 
 class ConstantTextColumn(Column):
 
@@ -142,16 +275,69 @@ class ConstantTextColumn(Column):
     def render_column(self, value):
         return self.text
 
+    def render_batch(self, values, rows):
+        return [self.text] * len(values)
+
+    def render_export(self, value, values_dict):
+        return self.text
+
 
 class DateColumn(Column):
     """
     Renders a date in Y-m-d format
+
+    Searched by range: "2020-01-01|2020-12-31", "2020-01-01|" or "|2020-12-31",
+    or a single date.  DateTimeFields are searched by their date.
     """
+    search_lookup = 'range'
+
+    def get_search_key(self, key, qs):
+        output_field = qs.query.clone().resolve_ref(key).output_field
+        if isinstance(output_field, DateTimeField):
+            return '{0}__date'.format(key)
+        return key
+
     def render_column(self, value):
         if value:
-            return value.strftime("%Y-%m-%d").upper()
+            return format_date(value)
         return ''
 
+    def render_batch(self, values, rows):
+        # Pages and exports repeat dates, each one is formatted once
+        formatted = {}
+        render_column = self.render_column
+        rendered = []
+        for value in values:
+            try:
+                rendered.append(formatted[value])
+            except KeyError:
+                rendered.append(formatted.setdefault(value, render_column(value)))
+        return rendered
+
+    def render_export(self, value, values_dict):
+        return value
+
+    def get_search_filter(self, key, value):
+        if not self.search_lookup:
+            return None
+        if '|' not in value:
+            date = _parse_date(value)
+            return Q(**{key: date}) if date else None
+
+        start, end = [_parse_date(part) for part in value.split('|', 1)]
+        q = Q()
+        if start:
+            q &= Q(**{'{0}__gte'.format(key): start})
+        if end:
+            q &= Q(**{'{0}__lte'.format(key): end})
+        return q or None
+
+    def render_search_input(self, index):
+        attrs = format_html(
+            'class="form-control input-sm" data-column="{}" data-debounce="{}"',
+            index, self.search_debounce or 0)
+        return format_html('<input type="date" {0}><input type="date" {0}>', attrs)
+
 
 class StringColumn(Column):
     """
@@ -161,3 +347,19 @@ class StringColumn(Column):
     def __init__(self, *args, **kwargs):
         self.db_independant = True
         super(StringColumn, self).__init__(*args, **kwargs)
+
+
+class ExpressionColumn(Column):
+    """
+    A value computed by the database from a query expression, eg:
+    Concat('first_name', Value(' '), 'last_name').  The expression is
+    annotated on the queryset under the column name (or value), so the
+    column can be ordered and searched like a field.  Column searches
+    match prefixes, which an expression index can serve; pass
+    search_lookup='icontains' to match anywhere in the value.
+    """
+    search_lookup = 'istartswith'
+
+    def __init__(self, expression, *args, **kwargs):
+        self.expression = expression
+        super(ExpressionColumn, self).__init__(*args, **kwargs)
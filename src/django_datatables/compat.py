@@ -0,0 +1,12 @@
+"""
+Differences between the supported Django versions
+"""
+
+import django
+
+# QuerySet.acount() and async iteration of querysets
+ASYNC_ORM = django.VERSION >= (4, 1)
+# cache.aget() / cache.aset()
+ASYNC_CACHE = django.VERSION >= (4, 0)
+# Lookups wrap the sql of an expression on their right hand side in parentheses
+LOOKUPS_PARENTHESIZE_EXPRESSIONS = django.VERSION < (3, 0)
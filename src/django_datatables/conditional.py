@@ -0,0 +1,63 @@
+"""
+Conditional requests for data responses
+
+With Meta.conditional set, data responses carry an ETag built from the
+parameters of the request (see DatatableRequest.signature) and a
+fingerprint of the rows they are drawn from:
+
+* with Meta.updated_field, the latest value of that field and the count
+  of the filtered rows, in a single aggregate query
+* otherwise, the cache generations of model and cache_models, bumped by
+  their post_save / post_delete signals (see caching.py), with no query
+
+A request whose If-None-Match holds the current ETag is answered with 304
+Not Modified, without counting, fetching, rendering or serializing the
+page.  Responses are still not stored by the browser: the table's
+javascript keeps the last response and replays it on a 304, as DataTables
+discards a response whose draw counter is out of date.
+"""
+
+import hashlib
+import logging
+
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.http import parse_etags, quote_etag
+
+from .caching import get_cache_models, get_generations
+
+LOG = logging.getLogger(__name__)
+
+
+def get_fingerprint(datatable, request):
+    """ Returns a value that changes when the rows of the table change """
+    updated_field = datatable._meta.get('updated_field')
+    if updated_field:
+        qs = datatable.annotate_columns(datatable.get_initial_queryset(request))
+        qs = datatable.filter_queryset(qs, request)
+        aggregate = qs.aggregate(updated=Max(updated_field), count=Count('pk'))
+        return aggregate['updated'], aggregate['count']
+    cache = caches[datatable._meta.get('cache_alias', 'default')]
+    return get_generations(cache, get_cache_models(datatable._meta))
+
+
+def get_etag(datatable, request):
+    """ Returns the quoted ETag of a data request, or None if it can not be built """
+    try:
+        with datatable.timings.phase('validate'):
+            signature = repr((
+                datatable._meta.datatable_id,
+                datatable.params.signature(),
+                get_fingerprint(datatable, request),
+                datatable.get_cache_key_extra(request),
+            ))
+    except Exception:
+        LOG.exception('Could not build the ETag of %s', type(datatable).__name__)
+        return None
+    return quote_etag(hashlib.sha1(signature.encode('utf-8')).hexdigest())
+
+
+def etag_matches(request, etag):
+    """ Returns True if the request's If-None-Match holds etag """
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return '*' in etags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in etags]
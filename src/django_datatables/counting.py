@@ -0,0 +1,210 @@
+"""
+Count strategies for recordsTotal and recordsFiltered
+
+A strategy is selected per table with Meta.count_strategy, either by name
+(see COUNT_STRATEGIES), as a CountStrategy subclass or as a dotted path.
+"""
+
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Count, Window
+from django.utils.module_loading import import_string
+
+from .compat import ASYNC_ORM
+
+
+class CountStrategy(object):
+    """
+    Counts the unfiltered and filtered querysets of a draw.
+
+    The counts and the page query do not depend on each other, so they can
+    run in any order or concurrently.  needs_filtered_count tells whether
+    the filtered count is a query of its own; when it is not, the count is
+    taken from the total (reuse_total) or from the fetched page rows
+    (annotate_page), see resolve_filtered.
+    """
+    approximate = False
+    reuse_total = False
+
+    def __init__(self, datatable):
+        self.datatable = datatable
+        self._meta = datatable._meta
+        self.deferred = False
+
+    def count_total(self, qs):
+        return qs.count()
+
+    def count_filtered(self, qs):
+        return qs.count()
+
+    async def acount_total(self, qs):
+        return await sync_to_async(self.count_total)(qs)
+
+    async def acount_filtered(self, qs):
+        return await sync_to_async(self.count_filtered)(qs)
+
+    def annotate_page(self, qs, filtered):
+        return qs
+
+    def needs_filtered_count(self, filtered):
+        return not self.deferred and (filtered or not self.reuse_total)
+
+    def resolve_filtered(self, count, total, rows, qs):
+        """ Returns recordsFiltered from the results of the draw's queries """
+        if self.deferred:
+            return self.count_from_page(rows, qs)
+        if count is None:
+            return total
+        return count
+
+    def count_from_page(self, rows, qs):
+        return qs.count()
+
+
+class ExactCount(CountStrategy):
+    """ Runs COUNT(*) for both counts on every draw """
+
+    async def acount_total(self, qs):
+        if not ASYNC_ORM:
+            return await super(ExactCount, self).acount_total(qs)
+        return await qs.acount()
+
+    async def acount_filtered(self, qs):
+        if not ASYNC_ORM:
+            return await super(ExactCount, self).acount_filtered(qs)
+        return await qs.acount()
+
+
+class SkipUnfilteredCount(ExactCount):
+    """ Reuses the total count when no search or filter is active """
+    reuse_total = True
+
+
+class CachedCount(SkipUnfilteredCount):
+    """
+    Caches counts in the Django cache framework, keyed by the SQL of the
+    counted queryset.  A shared backend (memcached, redis, database) shares
+    the counts across worker processes.
+    """
+
+    def count_total(self, qs):
+        return self.cached_count(qs)
+
+    def count_filtered(self, qs):
+        return self.cached_count(qs)
+
+    async def acount_total(self, qs):
+        return await sync_to_async(self.count_total)(qs)
+
+    async def acount_filtered(self, qs):
+        return await sync_to_async(self.count_filtered)(qs)
+
+    def cached_count(self, qs):
+        cache = caches[self._meta.get('count_cache_alias', 'default')]
+        try:
+            sql, params = qs.query.sql_with_params()
+        except EmptyResultSet:
+            # eg: .none() or pk__in=[], nothing to count
+            return 0
+        key = 'django_datatables:count:{0}:{1}'.format(
+            qs.model._meta.label_lower,
+            hashlib.sha1(repr((sql, params)).encode('utf-8')).hexdigest(),
+        )
+        count = cache.get(key)
+        if count is None:
+            count = qs.count()
+            cache.set(key, count, self._meta.get('count_cache_timeout', 60))
+        return count
+
+
+class EstimatedCount(SkipUnfilteredCount):
+    """
+    Uses the query planner's row estimate on PostgreSQL: pg_class.reltuples
+    for an unfiltered table and the EXPLAIN row estimate otherwise.
+    Small estimates (below Meta.count_estimate_threshold) and other
+    databases are counted exactly.
+    """
+
+    def count_total(self, qs):
+        return self.estimate(qs)
+
+    def count_filtered(self, qs):
+        return self.estimate(qs)
+
+    async def acount_total(self, qs):
+        return await sync_to_async(self.count_total)(qs)
+
+    async def acount_filtered(self, qs):
+        return await sync_to_async(self.count_filtered)(qs)
+
+    def estimate(self, qs):
+        if connections[qs.db].vendor != 'postgresql':
+            return qs.count()
+
+        if not qs.query.where and not qs.query.distinct:
+            estimate = self.reltuples(qs)
+        else:
+            plan = json.loads(qs.explain(format='json'))
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+
+        if estimate < self._meta.get('count_estimate_threshold', 10000):
+            return qs.count()
+        self.approximate = True
+        return estimate
+
+    def reltuples(self, qs):
+        with connections[qs.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [qs.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that were never analyzed
+        return row[0] if row else -1
+
+
+class WindowCount(SkipUnfilteredCount):
+    """
+    Folds the filtered count into the page query with COUNT(*) OVER ().
+    The window is computed before LIMIT/OFFSET so every page row carries
+    the full filtered count.  Requires window function support
+    (PostgreSQL, MySQL 8, SQLite 3.25+).
+    """
+    annotation = 'datatable_filtered_count'
+
+    def annotate_page(self, qs, filtered):
+        # The seek predicate of keyset pagination is part of the page
+        # query's WHERE clause, so the window would not count every match
+        if not filtered or self._meta.pagination == 'keyset':
+            return qs
+        self.deferred = True
+        self.datatable.page_annotations = [self.annotation]
+        return qs.annotate(**{self.annotation: Window(expression=Count('pk'))})
+
+    def count_from_page(self, rows, qs):
+        if rows:
+            return rows[0][self.annotation]
+        # Past the last row (or no match), the window has nothing to report
+        return qs.count()
+
+
+COUNT_STRATEGIES = {
+    'exact': ExactCount,
+    'skip_unfiltered': SkipUnfilteredCount,
+    'cached': CachedCount,
+    'estimate': EstimatedCount,
+    'window': WindowCount,
+}
+
+
+def get_count_strategy(datatable):
+    """ Returns the CountStrategy instance configured in Meta.count_strategy """
+    strategy = datatable._meta.get('count_strategy', 'exact')
+    if isinstance(strategy, str):
+        strategy = COUNT_STRATEGIES.get(strategy) or import_string(strategy)
+    return strategy(datatable)
@@ -2,58 +2,241 @@
 Datatable classes
 """
 
+import asyncio
+from collections import namedtuple
+from functools import partial
 import logging
 from json import dumps
 import sys
 
-from pyquerystring import parse
-
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db.models import Q
+from django.http import HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
 from django.utils.safestring import mark_safe
 from django.views.debug import ExceptionReporter
 from django.template.loader import select_template
 
 from .column import *
+from .compat import ASYNC_ORM
 from .mixins import DataResponse
 from .datatable_meta import DeclarativeFieldsMetaclass
+from .datatable_request import DatatableRequest
+from . import pagination
+from .counting import get_count_strategy
+from .caching import aget_cached_context_data, get_cached_context_data, is_successful
+from .cancellation import DrawSuperseded, get_draw_guard
+from .conditional import etag_matches, get_etag
+from .search import get_search_backend_class
+from .parallel import can_run_in_parallel, run_query, run_queries
+from .scroller import ScrollerBlocks
+from .instrumentation import get_query_capture
+from .timing import NullTimings, get_timings
 
 LOG = logging.getLogger(__name__)
 
+# The querysets of a draw, see DatatableBase.prepare_draw
+Draw = namedtuple('Draw', ['counter', 'qs', 'filtered_qs', 'page_qs', 'filtered'])
+# A query of a draw, run by run or its coroutine counterpart arun with qs
+DrawQuery = namedtuple('DrawQuery', ['phase', 'run', 'arun', 'qs'])
+
+
+def _compile_cell(step, method):
+    """
+    Chains the hooks of a RenderStep into a single callable, skipping the
+    ones that do nothing.
+    """
+    value_key = step.value_key
+    render_column = step.render_column
+    render_using_values = step.render_column_using_values
+    render_link = step.render_link
+
+    if method is not None and step.db_independant:
+        # db independant columns are rendered from the whole row
+        cell = method
+    else:
+        if render_column is None and render_using_values is None:
+            def cell(row):
+                return row.get(value_key)
+        elif render_using_values is None:
+            def cell(row):
+                return render_column(row.get(value_key))
+        elif render_column is None:
+            def cell(row):
+                return render_using_values(row.get(value_key), row)
+        else:
+            def cell(row):
+                return render_using_values(render_column(row.get(value_key)), row)
+
+        if method is not None:
+            render_value = cell
+
+            def cell(row):
+                return method(render_value(row))
+
+    if render_link is not None:
+        render_cell = cell
+
+        def cell(row):
+            return render_link(render_cell(row), row)
+
+    return cell
+
+
+def _compile_batch(step, method):
+    """
+    Returns a callable rendering the cells of a column for a list of rows
+    with the column's render_batch, or None when the column renders one
+    cell at a time.
+    """
+    render_batch = step.render_batch
+    if render_batch is None or (method is not None and step.db_independant):
+        return None
+    value_key = step.value_key
+    render_link = step.render_link
+
+    def render(rows):
+        values = render_batch([row.get(value_key) for row in rows], rows)
+        if method is not None:
+            values = [method(value) for value in values]
+        if render_link is not None:
+            values = [render_link(value, row) for value, row in zip(values, rows)]
+        return values
+    return render
+
+
+def _compile_export_cell(step, method, export_method):
+    """
+    Returns a callable that renders the export value of a cell from a row.
+    Links are never rendered; a column is exported by, in order: the
+    export_* method of the table, its render_* method, the column's
+    render_export, or its displayed value when it has no render_export.
+    """
+    value_key = step.value_key
+    if export_method is not None:
+        if step.db_independant:
+            return export_method
+        return lambda row: export_method(row.get(value_key))
+    if method is not None or step.render_export is None:
+        return _compile_cell(step._replace(render_link=None), method)
+    render_export = step.render_export
+    return lambda row: render_export(row.get(value_key), row)
+
+
+def depends_on(*values):
+    """
+    Declares the values a render_* method reads from the row.  They are
+    fetched only while the method's column is visible.
+
+        @depends_on('first_name', 'last_name')
+        def render_name(self, row):
+            ...
+    """
+    def decorator(method):
+        method.depends_on = values
+        return method
+    return decorator
+
+
+def _null_cell(row):
+    return None
+
 
 class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
     """ JSON data for datatables
     """
+    # Replaced by a Timings for each draw when Meta.timing is set, see timing.py
+    timings = NullTimings()
+
     class Meta:
+        abstract = True
         order_columns = []
         # max limit of records returned, do not allow to kill our server by huge sets of data
         max_display_length = 100
         extra_fields = []
         searching = False
+        # "offset" slices the queryset, "keyset" seeks from a cursor,
+        # "scroller" reads cached blocks of keys, see scroller.py
+        pagination = 'offset'
+        scroller_block_size = 500
+        scroller_timeout = 30
+        scroller_prefetch = 1
+        # unique field appended to the ordering for keyset pagination
+        keyset_tiebreaker = 'pk'
+        # how recordsTotal / recordsFiltered are counted, see counting.py
+        count_strategy = 'exact'
+        # rows fetched per database round trip when exporting
+        export_chunk_size = 2000
+        # how the search box filters rows, see search.py
+        search_backend = 'lookup'
+        # order search results by relevance first
+        search_rank = False
+        # run the counts and the page query concurrently, see parallel.py
+        parallel_queries = False
+        # milliseconds after which a query is explained and reported, see instrumentation.py
+        slow_query_threshold = None
+        slow_query_analyze = False
+        # send per phase timings in a Server-Timing header, see timing.py
+        timing = False
+        # export raw values instead of the rendered html, see render_export_rows
+        export_raw = True
+        # answer unchanged draws with 304 Not Modified, see conditional.py
+        conditional = False
+        updated_field = None
+        # stop the draws superseded by a newer one, see cancellation.py
+        supersede_draws = False
+        # milliseconds a count or page query may run
+        statement_timeout = None
 
     @property
-    def _querydict(self):
-        if self.request.method == 'POST':
-            return self.request.POST
-
-        return parse(self.request.GET)
+    def params(self):
+        """
+        The DataTables parameters of the current request, parsed once
+        """
+        params = self.__dict__.get('_params')
+        if params is None or params[0] is not self.request:
+            params = (self.request, DatatableRequest.from_request(
+                self.request, column_count=len(self._column_keys)))
+            self._params = params
+        return params[1]
 
     def get_column_titles(self):
         """ Return list of column titles for the template engine
         """
-        titles = []
-        for key, column in self.declared_fields.items():
-            titles.append(column.title if column.title else key.replace("_", " ").title())
-        return titles
+        return list(self._column_titles)
+
+    def get_hidden_columns(self):
+        """ Returns the indexes of the columns hidden in the browser, sent as nulls """
+        if getattr(self, 'request', None) is None:
+            return frozenset()
+        return self.params.hidden_columns
+
+    def get_unfetched_columns(self):
+        """
+        Returns the indexes of the hidden columns whose values are not
+        fetched.  The render_* method of a visible db_independant column
+        reads the whole row; unless it declares its values with depends_on
+        it may read any of them, so then every value is fetched.
+        """
+        hidden = self.get_hidden_columns()
+        for index, step in enumerate(self._render_plan):
+            if (index not in hidden and step.db_independant and step.method_name
+                    and step.depends_on is None):
+                return frozenset()
+        return hidden
 
     def get_values_list(self):
         """
         Returns a list of the values to retrieve from the ORM.
-        Do not return columns marked as db_independant.
+        Do not return columns marked as db_independant, or columns left out
+        of the page.
         """
+        unfetched = self.get_unfetched_columns()
         values = [
-            c.value if c.value else k for k, c in self.declared_fields.items(
-            ) if not getattr(c, 'db_independant', False)
+            c.value if c.value else k for i, (k, c) in enumerate(self.declared_fields.items(
+            )) if not getattr(c, 'db_independant', False) and i not in unfetched
         ]
         values.extend(self._meta.extra_fields)
         return values
@@ -63,58 +246,84 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
         Returns a list of values to retrieve
         The values will need to be referenced but might not be displayed
         """
+        unfetched = self.get_unfetched_columns()
         referenced_values = []
-        for column in self.declared_fields.values():
+        for index, column in enumerate(self.declared_fields.values()):
+            if index in unfetched:
+                continue
             referenced_values += column.get_referenced_values()
+            referenced_values += self._render_plan[index].depends_on or []
+        # keyset cursors are built from the order keys of the page rows
+        referenced_values += [key.lstrip('-') for key in getattr(self, 'seek_order', [])]
+        # annotations added to the page query, eg: a windowed count
+        referenced_values += getattr(self, 'page_annotations', [])
+        # scroller pages are put back in the order of their cached keys
+        if self._meta.pagination == 'scroller':
+            referenced_values.append('pk')
         return referenced_values
 
-    def _render_column(self, field, column, ic):
-        # Call the render_column method for each field
-        for ir, row_dict in enumerate(self.values_dicts):
-            self.rendered_columns[ir][ic] = column.render_column(row_dict.get(field))
-            self.rendered_columns[ir][ic] = column.render_column_using_values(
-                self.rendered_columns[ir][ic], row_dict)
-
-    def execute_method(self, method, column, ic):
-        for ir, row_dict in enumerate(self.values_dicts):
-            if getattr(column, 'db_independant', False):
-                # send row to db_indepenants
-                self.rendered_columns[ir][ic] = method(row_dict)
+    def _compile_cells(self):
+        """
+        Returns one callable per column that renders a cell from a row,
+        and the (index, callable) of the columns rendered in batches.
+        Built once per draw from the class render plan, so the row loop
+        does no attribute lookups or hook dispatch of its own.
+        """
+        hidden = self.get_hidden_columns()
+        cells = []
+        batches = []
+        for index, step in enumerate(self._render_plan):
+            if index in hidden:
+                cells.append(_null_cell)
+                continue
+            method = getattr(self, step.method_name) if step.method_name else None
+            batch = _compile_batch(step, method)
+            if batch is not None:
+                # Filled in by render_rows
+                cells.append(_null_cell)
+                batches.append((index, batch))
             else:
-                self.rendered_columns[ir][ic] = method(self.rendered_columns[ir][ic])
-
-    def _render_field(self, field, column, ic):
-        """ Call the render_{} method for each column in local class """
-        method_name = "render_{}".format(field)
-        if hasattr(self, method_name):
-            method = getattr(self, method_name)
-            if callable(method):
-                self.execute_method(method, column, ic)
-
-    def _render_link(self, column, ic):
-        """ Call the render_link to wrap column in link tag """
-        for ir, row_dict in enumerate(self.values_dicts):
-            self.rendered_columns[ir][ic] = column.render_link(
-                self.rendered_columns[ir][ic], row_dict)
+                cells.append(_compile_cell(step, method))
+        return cells, batches
+
+    def render_rows(self, rows):
+        """
+        Renders a list of values dicts in a single row-major pass, then
+        the columns that render in batches one column at a time.
+        """
+        cells, batches = self._compile_cells()
+        rendered = [[cell(row) for cell in cells] for row in rows]
+        for index, batch in batches:
+            for rendered_row, value in zip(rendered, batch(rows)):
+                rendered_row[index] = value
+        return rendered
+
+    def _compile_export_cells(self):
+        """ Returns one callable per column that renders an export cell from a row """
+        cells = []
+        for step in self._render_plan:
+            method = getattr(self, step.method_name) if step.method_name else None
+            export_method = (
+                getattr(self, step.export_method_name) if step.export_method_name else None)
+            cells.append(_compile_export_cell(step, method, export_method))
+        return cells
+
+    def render_export_rows(self, rows):
+        """
+        Renders a list of values dicts for an export: no links or markup,
+        and values kept as they were read (dates, numbers) where the
+        columns allow it.
+        """
+        if not self._meta.get('export_raw', True):
+            return self.render_rows(rows)
+        cells = self._compile_export_cells()
+        return [[cell(row) for cell in cells] for row in rows]
 
     def render_columns(self):
         """
         Renders a column on a row
         """
-        fields = self.declared_fields.keys()
-        self.rendered_columns = [[None] * len(fields) for i in range(len(self.values_dicts))]
-
-        for ic, field in enumerate(fields):
-            column = self.declared_fields[field]
-            if column.value:
-                field = column.value
-
-            self._render_column(field, column, ic)
-            self._render_field(field, column, ic)
-
-            if column.has_link():
-                self._render_link(column, ic)
-
+        self.rendered_columns = self.render_rows(self.values_dicts)
         return self.rendered_columns
 
     def ordering(self, qs):
@@ -123,72 +332,203 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
         """
         order = []
 
-        sorting_cols = self._querydict.get('order', {})
-        for info in sorting_cols:
-            column_index = int(info['column'])
-            declared_fields_keys = list(self.declared_fields.keys())
-            field = declared_fields_keys[column_index]
+        if self._meta.search_rank and self.is_searching():
+            qs, rank_order = self.get_search_backend().rank(qs, self.params.search_value)
+            order.append(rank_order)
+
+        for sort in self.params.order:
+            field = self._column_keys[sort.column]
             column_key = self.declared_fields[field].value or field
 
-            sort_dir = '-' if info['dir'] == 'desc' else ''
+            sort_dir = '-' if sort.descending else ''
             order.append('{0}{1}'.format(sort_dir, column_key))
 
+        if self._meta.pagination == 'keyset':
+            order = pagination.keyset_order(order, self._meta.keyset_tiebreaker)
+            self.seek_order = order
+            self.seek_nullable = pagination.nullable_keys(qs.model, order)
+            # NULLs sort last, where the seek predicate expects them
+            return qs.order_by(*pagination.order_expressions(order))
+
+        if self._meta.pagination == 'scroller':
+            # Blocks are queried at different times, each row needs one position
+            order = pagination.keyset_order(order)
+
         if order:
             return qs.order_by(*order)
         return qs
 
+    def get_page_limit(self):
+        """ Returns the number of rows of the page, -1 when paging is disabled """
+        return min(self.params.length, self._meta.max_display_length)
+
     def paging(self, qs):
         """ Paging
         """
-        limit = min(int(self._querydict.get('length', 25)), self._meta.max_display_length)
-        start = int(self._querydict.get('start', 0))
+        limit = self.get_page_limit()
+        start = self.params.start
 
         # if pagination is disabled ("paging": false)
         if limit == -1:
             return qs
 
+        if self._meta.pagination == 'keyset':
+            return self.keyset_paging(qs, start, limit)
+
         offset = start + limit
 
         return qs[start:offset]
 
+    def keyset_paging(self, qs, start, limit):
+        """
+        Seek to the page after or before the cursor sent by the client.
+        Falls back to offset paging when there is no usable cursor, eg: the
+        first page, a jump to an arbitrary page or a changed ordering.
+        """
+        self.page_limit = limit
+        self.page_start = start
+        cursor = pagination.decode_cursor(self.params.cursor, self.seek_order)
+        if cursor is None:
+            return qs[start:start + limit]
+
+        values, direction = cursor
+        if direction == pagination.PREVIOUS:
+            # Walk backwards from the cursor, prepare_results restores the order
+            self.seek_reversed = True
+            order = pagination.reverse_order(self.seek_order)
+            seek = pagination.seek_filter(order, values, self.seek_nullable, nulls_first=True)
+            return qs.filter(seek).order_by(
+                *pagination.order_expressions(order, nulls_first=True))[:limit]
+
+        seek = pagination.seek_filter(self.seek_order, values, self.seek_nullable)
+        return qs.filter(seek)[:limit]
+
+    def get_cursors(self):
+        """
+        Returns the cursors for the pages before and after the current page
+        """
+        cursors = {}
+        if not self.values_dicts:
+            return cursors
+        if self.page_start > 0:
+            cursors['prevCursor'] = pagination.encode_cursor(
+                self.seek_order, self.values_dicts[0], pagination.PREVIOUS)
+        if len(self.values_dicts) >= self.page_limit:
+            cursors['nextCursor'] = pagination.encode_cursor(
+                self.seek_order, self.values_dicts[-1], pagination.NEXT)
+        return cursors
+
     def get_initial_queryset(self, request):
         if not self._meta.model:
             raise NotImplementedError("Need to provide a model or implement get_initial_queryset!")
         return self._meta.model.objects.all()
 
+    def annotate_columns(self, qs):
+        """ Annotates the expressions of the ExpressionColumns on the queryset """
+        expressions = {
+            column.value or key: column.expression
+            for key, column in self.declared_fields.items()
+            if getattr(column, 'expression', None) is not None
+        }
+        if expressions:
+            return qs.annotate(**expressions)
+        return qs
+
     def filter_through_field_lookup(self, search):
         field_lookup_suffixes = ('exact', 'contains', 'startswith',
                                  'endswith', 'search', 'regex')
 
+        q = Q()
         for field_lookup in self._meta.search_fields:
             if not field_lookup.endswith(field_lookup_suffixes):
-                    # if no suffix provided, append "__icontains"
+                # if no suffix provided, append "__icontains"
                 field_lookup += '__icontains'
             q |= Q(**{field_lookup: search})
 
         return q
 
+    def get_search_backend(self):
+        """ Returns the backend selected with Meta.search_backend """
+        backend = self.__dict__.get('_search_backend')
+        if backend is None:
+            backend = self._search_backend = get_search_backend_class(self._meta)(self)
+        return backend
+
+    def is_searching(self):
+        """ Returns True if the search box value is long enough to search with """
+        search = self.params.search_value
+        return bool(search) and len(search) >= self._meta.get('search_min_length', 0)
+
     def filter_by_search(self, qs):
         """
-        Filter queryset as specified by search_fields
-        Searches on icontains unless otherwise specified
+        Filter queryset as specified by search_fields, using the search backend.
+        The default backend searches on icontains unless otherwise specified
         """
-        search = self.request.GET.get('search[value]', None)
-        if not search:
+        if not self.is_searching():
             return qs
+        return self.get_search_backend().filter(qs, self.params.search_value)
 
-        if getattr(self._meta, 'search_min_length', 0) <= len(search) and hasattr(
-                self._meta, "search_fields"):
-            q = Q()
-            q = self.filter_through_field_lookup(search)
-            qs = qs.filter(q)
+    def get_values_to_fetch(self):
+        """ Returns the set of values to request from the ORM """
+        values_to_get = set(self.get_values_list())
+        return values_to_get.union(set(self.get_referenced_values()))
 
+    def filter_by_columns(self, qs):
+        """
+        Filter queryset by the search value of each column, as declared by the column
+        """
+        q = Q()
+        for column_request in self.params.columns:
+            if not column_request.search_value or not column_request.searchable:
+                continue
+            key = self._column_keys[column_request.index]
+            column = self.declared_fields[key]
+            if getattr(column, 'db_independant', False):
+                continue
+            column_q = column.get_search_filter(
+                column.get_search_key(column.value or key, qs), column_request.search_value)
+            if column_q is not None:
+                q &= column_q
+        if q:
+            return qs.filter(q)
         return qs
 
+    def get_filter_params(self, request):
+        """ Returns the filter form values sent as additional_data """
+        return self.params.filter_params
+
+    def filter_queryset(self, qs, request):
+        """
+        Applies the search box, the column searches and the filter form to the queryset
+        """
+        with self.timings.phase('search'):
+            qs = self.filter_by_search(qs)
+        with self.timings.phase('filter'):
+            qs = self.filter_by_columns(qs)
+            filter_params = self.get_filter_params(request)
+            if filter_params:
+                qs = qs.filter(**filter_params)
+        return qs
+
+    def fetch_page(self, page_qs):
+        """ Runs the page query, returning rows in display order """
+        if self._meta.pagination == 'scroller':
+            return self.scroller.fetch_page(page_qs, self.params.start, self.page_limit)
+        rows = list(page_qs)
+        if getattr(self, 'seek_reversed', False):
+            rows.reverse()
+        return rows
+
+    async def afetch_page(self, page_qs):
+        if self._meta.pagination == 'scroller' or not ASYNC_ORM:
+            return await sync_to_async(self.fetch_page)(page_qs)
+        rows = [row async for row in page_qs]
+        if getattr(self, 'seek_reversed', False):
+            rows.reverse()
+        return rows
+
     def prepare_results(self, qs):
-        values_to_get = set(self.get_values_list())
-        values_to_get = values_to_get.union(set(self.get_referenced_values()))
-        self.values_dicts = qs.values(*values_to_get)
+        self.values_dicts = self.fetch_page(qs.values(*self.get_values_to_fetch()))
 
         rendered_values = self.render_columns()
         data = [row for row in rendered_values]
@@ -199,7 +539,7 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
         Gets all data, unpaged, as a list of dicts.
         """
         try:
-            qs = self.get_initial_queryset(request)
+            qs = self.annotate_columns(self.get_initial_queryset(request))
             qs = self.filter_by_search(qs)
             qs = self.ordering(qs)
             data = self.prepare_results(qs)
@@ -208,6 +548,89 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
             data = {'error': self.report_traceback()}
         return data
 
+    def iter_data(self, request, chunk_size=None):
+        """
+        Yields all rows rendered for export, unpaged, without holding the
+        result set in memory.  Rows are streamed from the database with
+        QuerySet.iterator() and rendered one chunk at a time.
+        """
+        chunk_size = chunk_size or self._meta.export_chunk_size
+        qs = self.annotate_columns(self.get_initial_queryset(request))
+        qs = self.filter_queryset(qs, request)
+        qs = self.ordering(qs)
+        rows = qs.values(*self.get_values_to_fetch()).iterator(chunk_size=chunk_size)
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield from self.render_export_rows(chunk)
+                chunk = []
+        if chunk:
+            yield from self.render_export_rows(chunk)
+
+    def prepare_draw(self, request):
+        """
+        Builds the querysets of a draw without running them: the unfiltered
+        queryset counted for recordsTotal, the filtered one and the page.
+        """
+        counter = get_count_strategy(self)
+        with self.timings.phase('initial'):
+            qs = self.annotate_columns(self.get_initial_queryset(request))
+        filtered_qs = self.filter_queryset(qs, request)
+        filtered = filtered_qs is not qs
+
+        with self.timings.phase('page'):
+            page_qs = self.ordering(filtered_qs)
+            if self._meta.pagination == 'scroller':
+                # The page is fetched by primary key, see fetch_page
+                self.scroller = ScrollerBlocks(self, request, page_qs)
+                limit = self.get_page_limit()
+                self.page_limit = limit if limit >= 0 else self._meta.max_display_length
+                page_qs = filtered_qs
+            else:
+                page_qs = counter.annotate_page(page_qs, filtered)
+                page_qs = self.paging(page_qs)
+            page_qs = page_qs.values(*self.get_values_to_fetch())
+        return Draw(counter, qs, filtered_qs, page_qs, filtered)
+
+    def get_draw_queries(self, draw):
+        """
+        Returns the queries of a draw, which do not depend on each other:
+        the total count, the page and, when needed, the filtered count.
+        """
+        counter = draw.counter
+        queries = [
+            DrawQuery('count_total', counter.count_total, counter.acount_total, draw.qs),
+            DrawQuery('page', self.fetch_page, self.afetch_page, draw.page_qs),
+        ]
+        if counter.needs_filtered_count(draw.filtered):
+            queries.append(DrawQuery(
+                'count_filtered', counter.count_filtered, counter.acount_filtered,
+                draw.filtered_qs))
+        if self._meta.pagination == 'scroller':
+            # Counts are cached with the key blocks
+            queries = [query if query.phase == 'page' else query._replace(
+                run=self.scroller.cached(query.phase, query.run),
+                arun=sync_to_async(self.scroller.cached(query.phase, query.run)),
+            ) for query in queries]
+        return queries
+
+    def build_context_data(self, draw, total_records, total_display_records, rows):
+        """ Renders the fetched page rows into the json response """
+        self.values_dicts = rows
+        with self.timings.phase('render'):
+            data = self.render_columns()
+        json_response = {"draw": self.params.draw,
+                         "recordsTotal": total_records,
+                         "recordsFiltered": total_display_records,
+                         "data": data}
+        if draw.counter.approximate:
+            json_response['recordsApproximate'] = True
+        if self._meta.pagination == 'keyset' and hasattr(self, 'page_limit'):
+            json_response.update(self.get_cursors())
+        return json_response
+
     def get_context_data(self, request):
         """
         Gets paginated data.
@@ -216,32 +639,51 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
 
         json_response = dict(draw=0, recordsTotal=0, recordsFiltered=0, data=[])
 
-        additional_data = request.GET.get("additional_data")
-        filter_params = parse(additional_data) if additional_data else {}
         try:
-            qs = self.get_initial_queryset(request)
-            total_records = qs.count()
-            qs = self.filter_by_search(qs)
-            if filter_params:
-                qs = qs.filter(**filter_params)
-
-            # number of records after filtering
-            total_display_records = qs.count()
-
-            qs = self.ordering(qs)
-            qs = self.paging(qs)
-            data = self.prepare_results(qs)
-            json_response.update({"draw": int(self._querydict.get('draw', 0)),
-                                  "recordsTotal": total_records,
-                                  "recordsFiltered": total_display_records,
-                                  "data": data})
-
+            capture = get_query_capture(self)
+            with get_draw_guard(self, request) as guard:
+                guard.check()
+                draw = capture.wrap('prepare', self.prepare_draw)(request)
+                counter = draw.counter
+                using = draw.qs.db
+                queries = [(self.timings.wrap(query.phase, capture.wrap(
+                    query.phase, guard.wrap(query.run, using))), query.qs)
+                    for query in self.get_draw_queries(draw)]
+                parallel = self._meta.parallel_queries and can_run_in_parallel(using)
+                total_records, rows, *filtered_count = run_queries(queries, parallel)
+
+                total_display_records = capture.wrap('count_filtered', guard.wrap(
+                    counter.resolve_filtered, using))(
+                    filtered_count[0] if filtered_count else None, total_records, rows,
+                    draw.filtered_qs)
+            capture.report()
+
+            json_response.update(self.build_context_data(
+                draw, total_records, total_display_records, rows))
+
+        except DrawSuperseded:
+            json_response.update(draw=self.params.draw, superseded=True)
         except Exception as e:
             LOG.exception(str(e))
             json_response['error'] = self.report_traceback()
 
         return json_response
 
+    def get_cache_key_extra(self, request):
+        """
+        Returns a value added to the response cache key.  Override when
+        get_initial_queryset depends on the request, eg: per user querysets.
+        """
+        return None
+
+    def get_cached_context_data(self, request):
+        """
+        Returns get_context_data, from the response cache if Meta.cache is set
+        """
+        if self._meta.get('cache', False):
+            return get_cached_context_data(self, request)
+        return self.get_context_data(request)
+
     def report_traceback(self):
         if settings.DEBUG:
             reporter = ExceptionReporter(None, *sys.exc_info())
@@ -250,6 +692,11 @@ class DatatableBase(metaclass=DeclarativeFieldsMetaclass):
 
 
 class Datatable(DatatableBase, DataResponse):
+    # The url name of the view serving the table's data
+    data_view = 'django_datatables:datatable_manager'
+
+    class Meta:
+        abstract = True
 
     def _config_columns(self):
         columns = []
@@ -259,6 +706,8 @@ class Datatable(DatatableBase, DataResponse):
                 column_config['className'] = column.css_class
             if key not in self._meta.order_columns:
                 column_config['orderable'] = False
+            if not column.searchable or getattr(column, 'db_independant', False):
+                column_config['searchable'] = False
             columns.append(column_config)
 
         return columns
@@ -270,8 +719,7 @@ class Datatable(DatatableBase, DataResponse):
             if order_col.startswith('-'):
                 order_col = order_col[1:]
                 order_dir = 'desc'
-            declared_fields_keys = list(self.declared_fields.keys())
-            order_index = declared_fields_keys.index(order_col)
+            order_index = self._column_keys.index(order_col)
             order.append([order_index, order_dir])
 
         return order
@@ -289,9 +737,30 @@ class Datatable(DatatableBase, DataResponse):
         # Initial Display Length
         config['iDisplayLength'] = self._meta.get('initial_rows_displayed', 25)
         config['serverSide'] = self._meta.get('server_side', True)
+        if self._meta.get('column_search', False):
+            # Sort by clicking the titles, not the row of search inputs
+            config['orderCellsTop'] = True
+        if self._meta.pagination == 'scroller':
+            # Needs the DataTables Scroller extension
+            config['scroller'] = True
+            config['deferRender'] = True
+            config['scrollY'] = self._meta.get('scroll_y', 400)
 
         return mark_safe(dumps(config))
 
+    def get_column_search_inputs(self):
+        """
+        Returns the search input of each column for the column search row,
+        or None for columns that can not be searched.
+        """
+        inputs = []
+        for index, (key, column) in enumerate(self.declared_fields.items()):
+            if column.searchable and not getattr(column, 'db_independant', False):
+                inputs.append(column.render_search_input(index))
+            else:
+                inputs.append(None)
+        return inputs
+
     @property
     def filter_form(self):
         return self._meta.get('filter_form', None)
@@ -303,9 +772,117 @@ class Datatable(DatatableBase, DataResponse):
         template = select_template(['django_datatables/table.html'])
         context = {
             "can_export_to_excel": self._meta.get('export_to_excel', False),
-            "module": self.__module__,
-            "name": self.__class__.__name__,
+            "can_export_to_csv": self._meta.get('export_to_csv', False),
+            "can_export_to_ndjson": self._meta.get('export_to_ndjson', False),
+            "background_export": self._meta.get('background_export', False),
+            "column_search": self._meta.get('column_search', False),
+            "keyset_pagination": self._meta.pagination == 'keyset',
+            "conditional": self._meta.get('conditional', False),
+            "supersede_draws": self._meta.get('supersede_draws', False),
+            "datatable_id": self._meta.datatable_id,
+            "data_url": reverse(self.data_view),
             "datatable": self,
         }
         template_content = template.render(context)
         return mark_safe(template_content)
+
+
+class AsyncDatatable(Datatable):
+    """
+    A Datatable served by an async view, for ASGI deployments.
+
+    The total count, the filtered count and the page query of a draw are
+    awaited on Django's async ORM (Django 4.1+), which frees the event loop
+    while they wait, but they run one after another on the request's
+    connection.  With Meta.parallel_queries each query runs in its own
+    thread, on its own connection, so they overlap.
+    Exports are run synchronously.
+    """
+    data_view = 'django_datatables:async_datatable_manager'
+
+    class Meta:
+        abstract = True
+
+    async def aget_context_data(self, request):
+        """ The async counterpart of get_context_data """
+
+        json_response = dict(draw=0, recordsTotal=0, recordsFiltered=0, data=[])
+
+        try:
+            capture = get_query_capture(self)
+            with get_draw_guard(self, request) as guard:
+                guard.check()
+                # Building the querysets may touch the database (eg: request.user)
+                draw = await sync_to_async(capture.wrap('prepare', self.prepare_draw))(request)
+                counter = draw.counter
+                using = draw.qs.db
+                # The request's connection lives in the thread of the sync code
+                parallel = self._meta.parallel_queries and await sync_to_async(
+                    can_run_in_parallel)(using)
+                if parallel:
+                    # Each query runs in its own thread, on its own connection
+                    queries = [self.timings.awrap(query.phase, sync_to_async(partial(
+                        run_query, capture.wrap(query.phase, guard.wrap(query.run, using))),
+                        thread_sensitive=False))(query.qs)
+                        for query in self.get_draw_queries(draw)]
+                elif capture.enabled or guard.enabled:
+                    # Queries are recorded and guarded in the thread running them
+                    queries = [self.timings.awrap(query.phase, sync_to_async(capture.wrap(
+                        query.phase, guard.wrap(query.run, using))))(query.qs)
+                        for query in self.get_draw_queries(draw)]
+                else:
+                    queries = [self.timings.awrap(query.phase, query.arun)(query.qs)
+                               for query in self.get_draw_queries(draw)]
+                total_records, rows, *filtered_count = await asyncio.gather(*queries)
+
+                args = (filtered_count[0] if filtered_count else None, total_records, rows,
+                        draw.filtered_qs)
+                if counter.deferred:
+                    # An empty page carries no window count and falls back to a query
+                    total_display_records = await sync_to_async(capture.wrap(
+                        'count_filtered', guard.wrap(counter.resolve_filtered, using)))(*args)
+                else:
+                    total_display_records = counter.resolve_filtered(*args)
+            if capture.slow_queries:
+                await sync_to_async(capture.report)()
+
+            json_response.update(self.build_context_data(
+                draw, total_records, total_display_records, rows))
+
+        except DrawSuperseded:
+            json_response.update(draw=self.params.draw, superseded=True)
+        except Exception as e:
+            LOG.exception(str(e))
+            json_response['error'] = self.report_traceback()
+
+        return json_response
+
+    async def aget_cached_context_data(self, request):
+        if self._meta.get('cache', False):
+            return await aget_cached_context_data(self, request)
+        return await self.aget_context_data(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = request
+        if self.params.export in self.export_responses:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        self.timings = get_timings(self)
+        etag = None
+        if self._meta.get('conditional', False):
+            etag = await sync_to_async(get_etag)(self, request)
+        if etag is not None and etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            func_val = await self.aget_cached_context_data(request)
+            response = self.create_data_response(func_val, request)
+            if not is_successful(func_val):
+                # The client replays the body of its ETag on a 304
+                etag = None
+        if etag is not None:
+            response['ETag'] = etag
+        if self.timings.enabled:
+            await sync_to_async(self.timings.report)(self, response)
+
+        add_never_cache_headers(response)
+        return response
@@ -1,5 +1,19 @@
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from .column import *
+from .caching import get_cache_models, watch_models
+from .registry import register
+from .search import get_search_backend_class
+
+# Meta options that apply to the class declaring them, not to subclasses
+NON_INHERITED_META = ('abstract', 'datatable_id')
+
+
+# A column's rendering resolved at class creation, see compile_render_plan
+RenderStep = namedtuple('RenderStep', [
+    'value_key', 'render_column', 'render_column_using_values',
+    'method_name', 'db_independant', 'render_link', 'depends_on',
+    'render_export', 'export_method_name', 'render_batch',
+])
 
 
 class AttrDict(dict):
@@ -49,7 +63,8 @@ def collect_current_columns(attrs):
 def assign_meta(new_class, bases, meta):
     m = {}
     for base in bases:
-        m.update({k: v for k, v in getattr(base, "_meta", {}).items()})
+        m.update({k: v for k, v in getattr(base, "_meta", {}).items()
+                  if k not in NON_INHERITED_META})
 
     m.update({k: v for k, v in getattr(meta, "__dict__", {}).items() if not k.startswith("__")})
     _meta = AttrDict(m)
@@ -79,6 +94,83 @@ def define_declared_fields(new_class):
     return declared_fields
 
 
+def _overrides(column, method_name):
+    """ Returns True if the column's class replaces a Column method """
+    return getattr(type(column), method_name) is not getattr(Column, method_name)
+
+
+def _defined_by(column, method_name):
+    """ Returns the class of the column that defines a method """
+    for cls in type(column).__mro__:
+        if method_name in vars(cls):
+            return cls
+
+
+def _renders_batches(column):
+    """
+    Returns True if the column renders its values in batches, with a
+    render_batch that is not inherited by a subclass overriding the
+    per-value hooks it replaces.
+    """
+    if not _overrides(column, 'render_batch'):
+        return False
+    batch_class = _defined_by(column, 'render_batch')
+    return all(
+        issubclass(batch_class, _defined_by(column, name))
+        for name in ('render_column', 'render_column_using_values'))
+
+
+def compile_render_plan(new_class, declared_fields):
+    """
+    Resolves everything needed to render a column once per class: the key
+    in the values dict, the column hooks (None when they are the no-op
+    defaults), the batch renderer, the render_* method, the values it
+    declares it depends on, the link renderer and how the column is
+    exported.
+    """
+    plan = []
+    for key, column in declared_fields.items():
+        value_key = column.value or key
+        method_name = "render_{}".format(value_key)
+        method = getattr(new_class, method_name, None)
+        if not callable(method):
+            method_name = None
+        export_method_name = "export_{}".format(value_key)
+        if not callable(getattr(new_class, export_method_name, None)):
+            export_method_name = None
+        # A column that renders its value but not its export value would
+        # lose its rendering, it is exported as displayed
+        render_export = column.render_export
+        if not _overrides(column, 'render_export') and (
+                _overrides(column, 'render_column')
+                or _overrides(column, 'render_column_using_values')):
+            render_export = None
+
+        plan.append(RenderStep(
+            value_key=value_key,
+            render_column=(
+                column.render_column if _overrides(column, 'render_column') else None),
+            render_column_using_values=(
+                column.render_column_using_values
+                if _overrides(column, 'render_column_using_values') else None),
+            method_name=method_name,
+            db_independant=getattr(column, 'db_independant', False),
+            render_link=column.render_link if column.has_link() else None,
+            depends_on=getattr(method, 'depends_on', None) if method_name else None,
+            render_export=render_export,
+            export_method_name=export_method_name,
+            render_batch=column.render_batch if _renders_batches(column) else None,
+        ))
+    return plan
+
+
+def get_column_titles(declared_fields):
+    return [
+        column.title if column.title else key.replace("_", " ").title()
+        for key, column in declared_fields.items()
+    ]
+
+
 class DeclarativeFieldsMetaclass(type):
     """
     Metaclass that collects Fields declared on the base classes.
@@ -100,5 +192,17 @@ class DeclarativeFieldsMetaclass(type):
         new_class.base_fields = declared_fields
         new_class.declared_fields = declared_fields
         new_class._meta = _meta
+        new_class._render_plan = compile_render_plan(new_class, declared_fields)
+        new_class._column_keys = list(declared_fields.keys())
+        new_class._column_titles = get_column_titles(declared_fields)
+
+        if (_meta.get('cache') or _meta.get('pagination') == 'scroller'
+                or (_meta.get('conditional') and not _meta.get('updated_field'))):
+            watch_models(get_cache_models(_meta), _meta.get('cache_alias', 'default'))
+
+        get_search_backend_class(_meta).contribute_to_class(new_class)
+
+        if not _meta.get('abstract', False):
+            register(new_class, _meta.get('datatable_id'))
 
         return new_class
@@ -0,0 +1,164 @@
+"""
+Parsed DataTables request parameters
+"""
+
+from collections import namedtuple
+
+from pyquerystring import parse
+
+Order = namedtuple('Order', ['column', 'descending'])
+
+
+def to_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def to_bool(value, default):
+    if value is None:
+        return default
+    return value == 'true'
+
+
+class ColumnRequest(object):
+    """ Parameters sent for one column """
+    __slots__ = ('index', 'data', 'name', 'searchable', 'orderable',
+                 'search_value', 'search_regex', 'visible')
+
+    def __init__(self, index):
+        self.index = index
+        self.data = None
+        self.name = None
+        self.searchable = True
+        self.orderable = True
+        self.search_value = ''
+        self.search_regex = False
+        self.visible = True
+
+
+class DatatableRequest(object):
+    """
+    The DataTables server-side protocol parameters of a request, parsed
+    and validated once.
+
+    The bracketed keys DataTables sends (columns[0][search][value],
+    order[0][dir], search[value], ...) have a fixed shape, so they are split
+    by hand rather than with a generic nested query string parser.  Only
+    additional_data, the serialized filter form, is parsed generically.
+    """
+
+    def __init__(self, querydict, column_count=None):
+        self.draw = 0
+        self.start = 0
+        self.length = 25
+        self.search_value = ''
+        self.search_regex = False
+        self.columns = []
+        self.order = []
+        self.filter_params = {}
+        self.cursor = None
+        self.export = None
+        # Identifies the page load a draw counter belongs to
+        self.client = None
+        self.parse(querydict, column_count)
+
+    @classmethod
+    def from_request(cls, request, column_count=None):
+        querydict = request.POST if request.method == 'POST' else request.GET
+        return cls(querydict, column_count)
+
+    def parse(self, querydict, column_count):
+        columns = {}
+        order = {}
+
+        for key, value in querydict.items():
+            if key.startswith('columns['):
+                parts = key[8:].rstrip(']').split('][')
+                index = to_int(parts[0], -1)
+                if index < 0 or (column_count is not None and index >= column_count):
+                    continue
+                column = columns.get(index)
+                if column is None:
+                    column = columns[index] = ColumnRequest(index)
+                self.parse_column(column, parts[1:], value)
+            elif key.startswith('order['):
+                parts = key[6:].rstrip(']').split('][')
+                if len(parts) == 2:
+                    order.setdefault(to_int(parts[0], -1), {})[parts[1]] = value
+            elif key == 'search[value]':
+                self.search_value = value
+            elif key == 'search[regex]':
+                self.search_regex = to_bool(value, False)
+            elif key == 'draw':
+                self.draw = to_int(value, 0)
+            elif key == 'start':
+                self.start = max(to_int(value, 0), 0)
+            elif key == 'length':
+                self.length = to_int(value, self.length)
+            elif key == 'additional_data':
+                self.filter_params = parse(value) if value else {}
+            elif key == 'cursor':
+                self.cursor = value
+            elif key == 'export':
+                self.export = value
+            elif key == 'client':
+                self.client = value
+
+        self.columns = [columns[index] for index in sorted(columns)]
+        for index in sorted(order):
+            info = order[index]
+            column = to_int(info.get('column'), -1)
+            if index < 0 or column < 0 or (column_count is not None and column >= column_count):
+                continue
+            self.order.append(Order(column, info.get('dir') == 'desc'))
+
+    def parse_column(self, column, parts, value):
+        if parts == ['search', 'value']:
+            column.search_value = value
+        elif parts == ['search', 'regex']:
+            column.search_regex = to_bool(value, False)
+        elif parts == ['data']:
+            column.data = value
+        elif parts == ['name']:
+            column.name = value
+        elif parts == ['searchable']:
+            column.searchable = to_bool(value, True)
+        elif parts == ['orderable']:
+            column.orderable = to_bool(value, True)
+        elif parts == ['visible']:
+            column.visible = to_bool(value, True)
+
+    @property
+    def hidden_columns(self):
+        """ The indexes of the columns hidden in the browser """
+        return frozenset(c.index for c in self.columns if not c.visible)
+
+    def signature(self):
+        """
+        Returns the parameters that determine the rows of a response, ie:
+        everything but draw, in a hashable and stable form.
+        """
+        return (
+            tuple(self.order),
+            self.start,
+            self.length,
+            self.search_value,
+            tuple((c.index, c.search_value) for c in self.columns if c.search_value),
+            repr(sorted(self.filter_params.items())),
+            self.cursor,
+            tuple(sorted(self.hidden_columns)),
+        )
+
+    def query_signature(self):
+        """
+        Returns the parameters that determine the filtered and ordered rows,
+        regardless of the page shown, in a hashable and stable form.
+        """
+        return (
+            tuple(self.order),
+            self.search_value,
+            tuple((c.index, c.search_value) for c in self.columns if c.search_value),
+            repr(sorted(self.filter_params.items())),
+        )
@@ -1,154 +1,121 @@
 import openpyxl
-from openpyxl.styles import Style, Font, Color
-from openpyxl.writer.dump_worksheet import ExcelDumpWriter
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
 
-from collections import defaultdict, OrderedDict
-from HTMLParser import HTMLParser
-from io import BytesIO
-from zipfile import ZipFile, ZIP_DEFLATED
+from collections import OrderedDict
+import datetime
+from decimal import Decimal
+from tempfile import TemporaryFile
 
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
+from .export import strip_tags
 
-class MLStripper(HTMLParser):
-    def __init__(self):
-        self.reset()
-        self.fed = []
+# Size of the chunks the finished workbook is streamed in
+STREAM_CHUNK_SIZE = 64 * 1024
 
-    def handle_data(self, d):
-        self.fed.append(d)
 
-    def get_data(self):
-        return ''.join(self.fed)
+def stream_file(fileobj, chunk_size=STREAM_CHUNK_SIZE):
+    """ Yields the contents of a file in chunks, then closes it """
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
 
-def strip_tags(html):
-    s = MLStripper()
-    s.feed(html)
-    return s.get_data()
 
 class ExcelWriter(object):
     """
-    Data structure of sheets with headers and data
-    that allows for consistent export of data to excel.
+    Writes rows straight into a write-only (streaming) workbook.
+
+    Rows are serialized to temporary files by openpyxl as they are added,
+    so memory use does not grow with the number of rows.  A write-only
+    workbook can only be saved once.
     """
 
     def __init__(self):
-        self.sheets = defaultdict(lambda: defaultdict(
-            headers=list(),
-            data=list(),
-        ))
-        self.workbook = openpyxl.Workbook(optimized_write=True)
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheets = OrderedDict()
+        self.headers = {}
+
+    def get_sheet(self, sheet_name):
+        """ Returns the worksheet named sheet_name, creating it if needed """
+        if sheet_name not in self.sheets:
+            self.sheets[sheet_name] = self.workbook.create_sheet(title=sheet_name)
+            self.headers[sheet_name] = []
+        return self.sheets[sheet_name]
 
     def add_headers(self, sheet_name, headers_list):
         """
-        Add headers to receipt.
+        Add a bold header row to a sheet.
         :param sheet_name: name of sheet
         :param headers_list: list of column headers
         """
-        self.sheets[sheet_name]["headers"].extend(headers_list)
-
-    def set_data(self, all_data):
-        """ Adds all data as {sheet_name:list(data)}"""
-        for sheet_name, data in all_data.items():
-            self.sheets[sheet_name]['data'] = data
-
-    def set_sheet_data(self, sheet_name, data):
-        """ Set a specific sheet to a list of data """
-        self.sheets[sheet_name]['data'] = data
-
-    def add_row(self, sheet_name, data_dict):
+        sheet = self.get_sheet(sheet_name)
+        self.headers[sheet_name].extend(headers_list)
+        header_font = Font(bold=True)
+        header_row = []
+        for header in headers_list:
+            cell = WriteOnlyCell(sheet, value=self.clean_value(header))
+            cell.font = header_font
+            header_row.append(cell)
+        sheet.append(header_row)
+
+    def add_row(self, sheet_name, row):
         """
         Append a row of data to a sheet
         :param sheet_name: name of sheet
-        :param data_dict:
+        :param row: list of values in column order, or
             dict where key, value --> col header name, row val to save
         """
-        self.sheets[sheet_name]['data'].append(data_dict)
-
-    def _get_row_style(self, row_dict):
-        """ Override this function with logic
-        that returns row style based on rec's contents
-        :param row_dict: dict where key, value --> col header, row's value
-        :return: None or an openpyxl.styles.Style
-        """
-        return None
-
-    def _create_sheets(self):
+        sheet = self.get_sheet(sheet_name)
+        if isinstance(row, dict):
+            row = [row.get(header) for header in self.headers[sheet_name]]
+        sheet.append([self.clean_value(value) for value in row])
+
+    def add_rows(self, sheet_name, rows):
+        """ Append every row of an iterable to a sheet """
+        for row in rows:
+            if row is not None:
+                self.add_row(sheet_name, row)
+
+    def clean_value(self, value):
         """
-        Creates sheets in workbook using current sheets data
-        """
-        header_style = Style(Font(bold=True))
-
-        for sheet_name, data in self.sheets.items():
-            sheet = self.workbook.create_sheet(title=sheet_name)
-
-            header_row = list()
-            for header in data['headers']:
-                header_row.append(dict(
-                    value=header,
-                    style=header_style,
-                ))
-            sheet.append(header_row)
-            row_num = 1
-
-            for rec in iter(data["data"]):
-                if rec is None:
-                    continue
-
-                outrow = list()
-                for index, key in enumerate(data['headers']):
-                    try:
-                        value = rec[key]
-                    except KeyError:
-                        value = ''
-                    if isinstance(value, list):
-                        value = '\r\n'.join(value)
-                    if value is None:
-                        value = ''
-                    if not isinstance(value, unicode):
-                        value = unicode(value).decode('utf-8')
-
-                    value = strip_tags(value)
-
-                    cell = dict(
-                        value=value,
-                        style=self._get_row_style(rec),
-                    )
-
-                    outrow.append(cell)
-
-                sheet.append(outrow)
-                row_num += 1
-
-    def _save_virtual_workbook(self):
-        """
-        Return an in-memory workbook, suitable for a Django response.
-
-        NOTE: Fixes openpyxl.writer.excel.save_virtual_workbook() for
-        optimized workbooks. Package function uses ExcelWriter instead of
-        ExcelDumpWriter with no way of specifying it.
-        Had to copy the function and change which Writer it used.
+        Convert a rendered value into something a cell can hold.
+        Numbers (including Decimals and booleans) and dates are kept as they
+        are, html is stripped from text.
+        Excel has no time zones: aware datetimes are written in local time.
         """
-        writer = ExcelDumpWriter(self.workbook)
-        temp_buffer = BytesIO()
-        try:
-            archive = ZipFile(temp_buffer, 'w', ZIP_DEFLATED)
-            writer.write_data(archive)
-        finally:
-            archive.close()
-        virtual_workbook = temp_buffer.getvalue()
-        temp_buffer.close()
-        return virtual_workbook
+        if value is None:
+            return ''
+        if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+            return timezone.make_naive(value)
+        if isinstance(value, (list, tuple)):
+            value = '\r\n'.join(str(v) for v in value)
+        elif not isinstance(value, (str, int, float, Decimal)) and not hasattr(value, 'isoformat'):
+            value = str(value)
+        if isinstance(value, str):
+            if '<' in value:
+                value = strip_tags(value)
+            value = ILLEGAL_CHARACTERS_RE.sub('', value)
+        return value
 
     def download(self, filename):
         """
-        Return an HttpResponse downloading the workbook
+        Return a StreamingHttpResponse downloading the workbook
         """
-        self._create_sheets()
+        workbook_file = TemporaryFile()
+        self.workbook.save(workbook_file)
+        workbook_file.seek(0)
 
-        response = HttpResponse(
-            self._save_virtual_workbook(),
-            content_type='application/vnd.ms-excel'
+        response = StreamingHttpResponse(
+            stream_file(workbook_file),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
         response['Content-Disposition'] = \
             'attachment; filename="{0}"'.format(filename)
@@ -159,5 +126,4 @@ class ExcelWriter(object):
         """"
         Save workbook to a file
         """
-        self._create_sheets()
         self.workbook.save(filename)
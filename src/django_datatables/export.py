@@ -0,0 +1,77 @@
+"""
+Streaming export formats
+"""
+
+import csv
+import json
+from html.parser import HTMLParser
+
+from django.core.serializers.json import DjangoJSONEncoder
+try:
+    from django.utils.encoding import force_str
+except ImportError:
+    from django.utils.encoding import force_text as force_str
+from django.utils.functional import Promise
+
+
+class LazyEncoder(DjangoJSONEncoder):
+    """Encodes django's lazy i18n strings
+    """
+
+    def default(self, obj):
+        if isinstance(obj, Promise):
+            return force_str(obj)
+        return super(LazyEncoder, self).default(obj)
+
+
+class MLStripper(HTMLParser):
+    def __init__(self):
+        super(MLStripper, self).__init__(convert_charrefs=True)
+        self.fed = []
+
+    def handle_data(self, d):
+        self.fed.append(d)
+
+    def get_data(self):
+        return ''.join(self.fed)
+
+
+def strip_tags(html):
+    s = MLStripper()
+    s.feed(html)
+    s.close()
+    return s.get_data()
+
+
+def clean_text(value):
+    """ Plain text version of a rendered cell for text export formats """
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        value = '\r\n'.join(str(v) for v in value)
+    value = str(value)
+    if '<' in value:
+        value = strip_tags(value)
+    return value
+
+
+class Echo(object):
+    """ A file-like object whose write() returns the value written """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    """ Yields a csv header line, then one line per rendered row """
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([clean_text(value) for value in row])
+
+
+def ndjson_lines(keys, rows, encoder=LazyEncoder):
+    """ Yields one json object per rendered row, keyed by column name """
+    for row in rows:
+        values = [clean_text(value) if isinstance(value, str) else value for value in row]
+        yield json.dumps(dict(zip(keys, values)), cls=encoder) + '\n'
@@ -0,0 +1,124 @@
+"""
+Slow query capture
+
+With Meta.slow_query_threshold (or the DATATABLES_SLOW_QUERY_THRESHOLD
+setting) set to a number of milliseconds, every query of a draw is timed
+and tagged with the phase that issued it:
+
+* prepare - building the querysets, eg: a full text search table check
+* count_total - the unfiltered count
+* count_filtered - the filtered count, with the search and filters
+* page - the ordered and paged rows
+
+Queries over the threshold are explained once the draw is done (EXPLAIN
+ANALYZE with Meta.slow_query_analyze, where the database supports it),
+logged as warnings to the django_datatables.instrumentation logger and
+sent with the slow_query signal.  When no threshold is set queries run
+unwrapped.
+"""
+
+from collections import namedtuple
+from contextlib import ExitStack
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .signals import slow_query
+
+LOG = logging.getLogger(__name__)
+
+QueryRecord = namedtuple('QueryRecord', ['phase', 'alias', 'sql', 'params', 'duration'])
+
+
+class NullCapture(object):
+    """ Runs the queries of a draw as they are """
+    enabled = False
+    slow_queries = ()
+
+    def wrap(self, phase, fn):
+        return fn
+
+    def report(self):
+        pass
+
+
+class QueryCapture(NullCapture):
+    """
+    Records the queries of a draw that run longer than threshold
+    milliseconds, and reports them once the draw is done.
+    """
+    enabled = True
+
+    def __init__(self, datatable, threshold, analyze=False):
+        self.datatable = datatable
+        self.threshold = threshold
+        self.analyze = analyze
+        self.slow_queries = []
+
+    def wrap(self, phase, fn):
+        """ Returns fn recording the queries it runs, in any thread, under phase """
+        def run(*args, **kwargs):
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.recorder(phase)))
+                return fn(*args, **kwargs)
+        return run
+
+    def recorder(self, phase):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = (time.perf_counter() - start) * 1000
+                if duration >= self.threshold and not many:
+                    self.slow_queries.append(QueryRecord(
+                        phase, context['connection'].alias, sql, params, duration))
+        return record
+
+    def explain(self, record):
+        """ Returns the plan of a recorded query, or None """
+        if not record.sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            # EXPLAIN ANALYZE runs the statement, only explain reads
+            return None
+        connection = connections[record.alias]
+        try:
+            try:
+                prefix = connection.ops.explain_query_prefix(**(
+                    {'analyze': True} if self.analyze else {}))
+            except ValueError:
+                # The database does not support ANALYZE
+                prefix = connection.ops.explain_query_prefix()
+            with connection.cursor() as cursor:
+                cursor.execute('{0} {1}'.format(prefix, record.sql), record.params)
+                rows = cursor.fetchall()
+        except Exception:
+            LOG.exception('Could not explain a slow datatable query')
+            return None
+        return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+    def report(self):
+        datatable_class = type(self.datatable)
+        for record in self.slow_queries:
+            plan = self.explain(record)
+            LOG.warning(
+                'Slow datatable query: %s %s took %.1fms\n%s\n%s',
+                datatable_class.__name__, record.phase, record.duration, record.sql, plan or '',
+            )
+            slow_query.send(
+                sender=datatable_class, datatable=self.datatable, phase=record.phase,
+                sql=record.sql, params=record.params, duration=record.duration, plan=plan,
+            )
+        self.slow_queries = []
+
+
+def get_query_capture(datatable):
+    """ Returns the QueryCapture of a draw, or a NullCapture when disabled """
+    threshold = datatable._meta.get('slow_query_threshold')
+    if threshold is None:
+        threshold = getattr(settings, 'DATATABLES_SLOW_QUERY_THRESHOLD', None)
+    if threshold is None:
+        return NullCapture()
+    return QueryCapture(datatable, threshold, datatable._meta.get('slow_query_analyze', False))
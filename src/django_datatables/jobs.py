@@ -0,0 +1,281 @@
+"""
+Background export jobs
+
+Exports are run by an executor with the concurrent.futures submit()
+interface.  The default runs them in a local thread pool; another executor
+can be plugged in with the DATATABLES_EXPORT_EXECUTOR setting, a dotted
+path to a callable returning the executor.  A job is submitted as
+run_export and plain string arguments (the job id, the datatable id, the
+query string of the request and its owner), so it can be serialized and
+run by another process, eg: a Celery task calling run_export; the table
+and the request are rebuilt from them.
+
+Job state is kept as json next to the exported file in the
+DATATABLES_EXPORT_DIR directory, so no broker or database table is needed
+and any process can report on a job.  Files older than
+DATATABLES_EXPORT_RETENTION seconds are deleted when a job is queued, or
+by calling cleanup_exports().
+"""
+
+from importlib import import_module
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.utils.module_loading import import_string
+
+from .export import csv_lines, ndjson_lines
+from .registry import get_datatable_class
+
+LOG = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+EXTENSIONS = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'excel': 'xlsx',
+}
+
+JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+JOB_FILE_RE = re.compile(r'^[0-9a-f]{32}\.')
+
+# Reported to the client, the exception itself is only logged
+EXPORT_FAILED = 'The export failed'
+
+_executor = None
+
+
+def close_connections_after(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        # Worker threads own their connections, do not leave them open
+        connections.close_all()
+
+
+class ThreadExecutor(ThreadPoolExecutor):
+    """ A thread pool whose workers close their database connections after each job """
+
+    def submit(self, fn, *args, **kwargs):
+        return super(ThreadExecutor, self).submit(close_connections_after, fn, *args, **kwargs)
+
+
+class InlineExecutor(object):
+    """ Runs jobs immediately in the calling thread, eg: for tests """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def get_export_dir():
+    export_dir = getattr(
+        settings, 'DATATABLES_EXPORT_DIR',
+        os.path.join(tempfile.gettempdir(), 'django_datatables_exports'))
+    os.makedirs(export_dir, exist_ok=True)
+    return export_dir
+
+
+def get_executor():
+    """ Returns the executor background exports are submitted to """
+    global _executor
+    if _executor is None:
+        executor = getattr(settings, 'DATATABLES_EXPORT_EXECUTOR', None)
+        if executor:
+            _executor = import_string(executor)()
+        else:
+            _executor = ThreadExecutor(
+                max_workers=getattr(settings, 'DATATABLES_EXPORT_WORKERS', 2),
+                thread_name_prefix='datatables-export',
+            )
+    return _executor
+
+
+def get_owner(request):
+    """ Identifies who may see a job: the user, else the session """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return 'user:{0}'.format(user.pk)
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return 'session:{0}'.format(session.session_key)
+    return None
+
+
+def get_owner_request(query_string, owner):
+    """
+    Rebuilds the GET request of an export from its query string, with the
+    user or the session of its owner (see get_owner).
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import AnonymousUser
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(query_string)
+    request.user = AnonymousUser()
+    kind, _, key = (owner or '').partition(':')
+    if kind == 'user':
+        user_model = get_user_model()
+        request.user = user_model._default_manager.filter(pk=key).first() or AnonymousUser()
+    elif kind == 'session':
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(key)
+    return request
+
+
+def cleanup_exports(max_age=None):
+    """
+    Deletes the files and state of the jobs last updated more than max_age
+    seconds ago (default: DATATABLES_EXPORT_RETENTION, one day)
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'DATATABLES_EXPORT_RETENTION', 24 * 60 * 60)
+    export_dir = get_export_dir()
+    expired = time.time() - max_age
+    for name in os.listdir(export_dir):
+        if not JOB_FILE_RE.match(name):
+            continue
+        path = os.path.join(export_dir, name)
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+        except OSError:
+            # Deleted by another process
+            pass
+
+
+class ExportJob(object):
+    """
+    State of a background export.
+    """
+
+    def __init__(self, id, export_format, filename, owner=None, state=QUEUED,
+                 rows_done=0, rows_total=None, error=None):
+        self.id = id
+        self.export_format = export_format
+        self.filename = filename
+        self.owner = owner
+        self.state = state
+        self.rows_done = rows_done
+        self.rows_total = rows_total
+        self.error = error
+
+    @classmethod
+    def create(cls, export_format, filename, owner=None):
+        job = cls(uuid.uuid4().hex, export_format, filename, owner)
+        job.save()
+        return job
+
+    @classmethod
+    def load(cls, job_id):
+        """ Returns the job with job_id, or None if there is no such job """
+        if not JOB_ID_RE.match(job_id or ''):
+            return None
+        try:
+            with open(cls.state_path(job_id)) as f:
+                return cls(**json.load(f))
+        except (IOError, ValueError):
+            return None
+
+    @staticmethod
+    def state_path(job_id):
+        return os.path.join(get_export_dir(), '{0}.json'.format(job_id))
+
+    @property
+    def path(self):
+        """ Path of the exported file """
+        return os.path.join(
+            get_export_dir(), '{0}.{1}'.format(self.id, EXTENSIONS[self.export_format]))
+
+    def save(self):
+        # Write then rename so readers never see a partial state file
+        path = self.state_path(self.id)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.__dict__, f)
+        os.replace(path + '.tmp', path)
+
+    def track(self, rows, every=1000):
+        """ Yields rows, saving progress every `every` rows """
+        for row in rows:
+            yield row
+            self.rows_done += 1
+            if self.rows_done % every == 0:
+                self.save()
+
+
+def write_export(datatable, export_format, rows, path):
+    """ Writes rendered rows to path in the given format """
+    if export_format == 'excel':
+        from .excel import ExcelWriter
+        title = datatable._meta.get("title", "Sheet")
+        xlwriter = ExcelWriter()
+        xlwriter.add_headers(title, datatable.get_column_titles())
+        xlwriter.add_rows(title, rows)
+        xlwriter.save_to_file(path)
+        return
+
+    if export_format == 'csv':
+        lines = csv_lines(datatable.get_column_titles(), rows)
+    else:
+        lines = ndjson_lines(list(datatable.declared_fields.keys()), rows)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(lines)
+
+
+def run_export(job_id, datatable_id, query_string, owner):
+    """ Runs an export job, called from the executor """
+    job = ExportJob.load(job_id)
+    if job is None:
+        LOG.error('Export job %s does not exist', job_id)
+        return
+    try:
+        job.state = RUNNING
+        datatable_class = get_datatable_class(datatable_id)
+        if datatable_class is None:
+            raise LookupError('Unknown datatable {0}'.format(datatable_id))
+        request = get_owner_request(query_string, owner)
+        datatable = datatable_class()
+        datatable.request = request
+
+        qs = datatable.annotate_columns(datatable.get_initial_queryset(request))
+        qs = datatable.filter_queryset(qs, request)
+        job.rows_total = qs.count()
+        job.save()
+
+        chunk_size = datatable._meta.export_chunk_size
+        rows = job.track(datatable.iter_data(request, chunk_size), every=chunk_size)
+        write_export(datatable, job.export_format, rows, job.path)
+        job.state = DONE
+    except Exception:
+        LOG.exception('Export job %s failed', job.id)
+        job.state = FAILED
+        job.error = EXPORT_FAILED
+    finally:
+        job.save()
+
+
+def enqueue_export(datatable, export_format, request):
+    """ Creates an export job and submits it to the executor """
+    cleanup_exports()
+    owner = get_owner(request)
+    job = ExportJob.create(
+        export_format,
+        datatable.get_export_filename(EXTENSIONS[export_format]),
+        owner=owner,
+    )
+    get_executor().submit(
+        run_export, job.id, datatable._meta.datatable_id, request.GET.urlencode(), owner)
+    return job
@@ -0,0 +1,92 @@
+"""
+Link urls of link columns
+
+reverse() is slow, and a link column reverses its url on every row.  The
+first time a view is linked with a number of arguments, its url is
+reversed once with numeric sentinel arguments and split into a template;
+rows then only quote their arguments into the template.  A template is
+checked against reverse() on first use, and views that can not be
+templated (eg: an argument restricted to four digits, or a converter that
+changes its value) are reversed through an LRU cache instead.  Templates
+are kept per urlconf and script prefix.
+
+Arguments are not validated against the url pattern when templated, and
+arguments holding a '/' are always reversed.
+"""
+
+from functools import lru_cache
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.urls import NoReverseMatch, get_script_prefix, get_urlconf, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+# Characters reverse() leaves unquoted in arguments
+SAFE_CHARACTERS = RFC3986_SUBDELIMS + '/~:@'
+
+SENTINEL = '7305196284{0:03d}'
+SENTINEL_RE = re.compile(r'7305196284(\d{3})')
+
+# (viewname, argument count, urlconf, script prefix) -> template, or None
+_templates = {}
+
+
+def compile_template(viewname, count, urlconf):
+    """
+    Returns the url of viewname as a list alternating literal parts and
+    argument indexes, or None when it can not be templated.
+    """
+    try:
+        url = reverse(viewname, args=[SENTINEL.format(i) for i in range(count)], urlconf=urlconf)
+    except NoReverseMatch:
+        return None
+    parts = SENTINEL_RE.split(url)
+    indexes = [int(index) for index in parts[1::2]]
+    if sorted(indexes) != list(range(count)):
+        return None
+    parts[1::2] = indexes
+    return parts
+
+
+def render_template(template, args):
+    """ Returns the url of a template, or None when an argument must be reversed """
+    quoted = []
+    for arg in args:
+        arg = str(arg)
+        if '/' in arg:
+            return None
+        quoted.append(quote(arg, safe=SAFE_CHARACTERS))
+    return ''.join(
+        quoted[part] if index % 2 else part for index, part in enumerate(template))
+
+
+@lru_cache(maxsize=4096)
+def cached_reverse(viewname, args, urlconf, prefix):
+    return reverse(viewname, args=args, urlconf=urlconf)
+
+
+def link_url(viewname, args):
+    """ Returns reverse(viewname, args=args), from a template where possible """
+    args = tuple(args)
+    urlconf = get_urlconf() or settings.ROOT_URLCONF
+    prefix = get_script_prefix()
+    key = (viewname, len(args), urlconf, prefix)
+    try:
+        template = _templates[key]
+    except KeyError:
+        template = compile_template(viewname, len(args), urlconf)
+        if template is not None:
+            url = render_template(template, args)
+            if url is None:
+                # Checked on a later row
+                return cached_reverse(viewname, args, urlconf, prefix)
+            if url != cached_reverse(viewname, args, urlconf, prefix):
+                template = None
+        _templates[key] = template
+
+    if template is not None:
+        url = render_template(template, args)
+        if url is not None:
+            return url
+    return cached_reverse(viewname, args, urlconf, prefix)
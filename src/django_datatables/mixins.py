@@ -1,19 +1,21 @@
 from datetime import datetime
 import logging
 
-from django.core.serializers.json import DjangoJSONEncoder
-from django.http import JsonResponse
-try:
-    from django.utils.encoding import force_str
-except ImportError:
-    from django.utils.encoding import force_text as force_str
-from django.utils.functional import Promise
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 try:
     from django.utils.translation import gettext as _
 except ImportError:
     from django.utils.translation import ugettext as _
 from django.utils.cache import add_never_cache_headers
 
+from .caching import is_successful
+from .conditional import etag_matches, get_etag
+from .export import LazyEncoder, csv_lines, ndjson_lines
+from .jobs import enqueue_export
+from .serializers import get_serializer
+from .timing import get_timings
+
 try:
     from .excel import ExcelWriter
 except ImportError:
@@ -22,37 +24,71 @@ except ImportError:
 LOG = logging.getLogger(__name__)
 
 
-class LazyEncoder(DjangoJSONEncoder):
-    """Encodes django's lazy i18n strings
-    """
+class DataResponse(object):
 
-    def default(self, obj):
-        if isinstance(obj, Promise):
-            return force_str(obj)
-        return super(LazyEncoder, self).default(obj)
+    # export=<format> query parameter to response method name
+    export_responses = {
+        'excel': 'create_excel_response',
+        'csv': 'create_csv_response',
+        'ndjson': 'create_ndjson_response',
+    }
+
+    def get_export_filename(self, extension):
+        title = self._meta.get("title", "Sheet")
+        return f'{title}-{datetime.now().strftime("%Y-%m-%d %H%m")}.{extension}'
+
+    def create_streaming_response(self, lines, content_type, extension):
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{0}"'.format(
+            self.get_export_filename(extension))
+        return response
 
+    def create_csv_response(self, request):
+        """
+        Return a csv file streamed row by row from the database.
+        """
+        lines = csv_lines(self.get_column_titles(), self.iter_data(request))
+        return self.create_streaming_response(lines, 'text/csv', 'csv')
 
-class DataResponse(object):
+    def create_ndjson_response(self, request):
+        """
+        Return newline delimited json, one object per row, streamed from the database.
+        """
+        lines = ndjson_lines(
+            list(self.declared_fields.keys()), self.iter_data(request), encoder=LazyEncoder)
+        return self.create_streaming_response(lines, 'application/x-ndjson', 'ndjson')
+
+    def create_export_job_response(self, export_format, request):
+        """
+        Queue the export in the background and return the job's status url.
+        """
+        job = enqueue_export(self, export_format, request)
+        response = JsonResponse({
+            'job': job.id,
+            'state': job.state,
+            'status_url': reverse('django_datatables:export_status', args=[job.id]),
+        }, status=202)
+        add_never_cache_headers(response)
+        return response
 
     def create_excel_response(self, request):
         """
         Return an excel writer as a response.
         """
         headers = self.get_column_titles()
-        rows = self.get_data(request)
-        title = getattr(self._meta, "title", "Sheet")
+        title = self._meta.get("title", "Sheet")
 
         xlwriter = ExcelWriter()
         xlwriter.add_headers(title, headers)
-        for row in rows:
-            xlwriter.add_row(title, dict(zip(headers, row)))
+        xlwriter.add_rows(title, self.iter_data(request))
 
-        return xlwriter.download(f'{title}-{datetime.now().strftime("%Y-%m-%d %H%m")}.xlsx')
+        return xlwriter.download(self.get_export_filename('xlsx'))
 
     def create_data_response(self, func_val, request):
         try:
             assert isinstance(func_val, dict)
-            response = dict(func_val)
+            # The context is built for this response, it is not copied
+            response = func_val
             if 'result' not in response:
                 response['result'] = 'ok'
         except KeyboardInterrupt:
@@ -63,17 +99,35 @@ class DataResponse(object):
             msg = getattr(e, 'message', _('Internal error') + ': ') + str(e)
             response = {'result': 'error', 'sError': msg, 'text': msg}
 
-        return JsonResponse(response)
+        with self.timings.phase('serialize'):
+            serializer = get_serializer()
+            return HttpResponse(
+                serializer.dumps_response(response), content_type=serializer.content_type)
 
     def dispatch(self, request, *args, **kwargs):
         self.request = request
         response = None
 
-        if request.GET.get("export") == "excel":
-            return self.create_excel_response(request)
-
-        func_val = self.get_context_data(request)
-        response = self.create_data_response(func_val, request)
+        export = self.export_responses.get(self.params.export)
+        if export and self._meta.get('background_export', False):
+            return self.create_export_job_response(self.params.export, request)
+        if export:
+            return getattr(self, export)(request)
+
+        self.timings = get_timings(self)
+        etag = get_etag(self, request) if self._meta.get('conditional', False) else None
+        if etag is not None and etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            func_val = self.get_cached_context_data(request)
+            response = self.create_data_response(func_val, request)
+            if not is_successful(func_val):
+                # The client replays the body of its ETag on a 304
+                etag = None
+        if etag is not None:
+            response['ETag'] = etag
+        if self.timings.enabled:
+            self.timings.report(self, response)
 
         add_never_cache_headers(response)
         return response
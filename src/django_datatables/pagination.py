@@ -0,0 +1,164 @@
+"""
+Keyset (seek) pagination helpers
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+
+CURSOR_SALT = 'django_datatables.pagination.cursor'
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps full precision for values used in seek predicates.
+    DjangoJSONEncoder truncates microseconds, which would make a cursor
+    skip or repeat rows that share a millisecond.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+            return obj.isoformat()
+        if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+            return str(obj)
+        return super(CursorEncoder, self).default(obj)
+
+
+class CursorSerializer(object):
+    """ Serializer for django.core.signing that understands cursor values """
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=CursorEncoder, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+def keyset_order(order, tiebreaker='pk'):
+    """
+    Returns the order_by list with a unique tiebreaker appended so that
+    every row has a distinct position.
+    """
+    order = list(order)
+    if tiebreaker not in [key.lstrip('-') for key in order]:
+        order.append(tiebreaker)
+    return order
+
+
+def seek_values(order, row):
+    """ Returns the values of the order keys for a values() row """
+    return [row[key.lstrip('-')] for key in order]
+
+
+def encode_cursor(order, row, direction):
+    """
+    Returns an opaque, signed cursor pointing before or after a row.
+    """
+    return signing.dumps(
+        {'k': order, 'v': seek_values(order, row), 'd': direction},
+        salt=CURSOR_SALT, serializer=CursorSerializer,
+    )
+
+
+def decode_cursor(cursor, order):
+    """
+    Returns (values, direction) from a cursor created for the same order,
+    or None if the cursor is missing, tampered with or out of date.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT, serializer=CursorSerializer)
+    except signing.BadSignature:
+        return None
+    if payload.get('k') != order or payload.get('d') not in (NEXT, PREVIOUS):
+        return None
+    return payload['v'], payload['d']
+
+
+def reverse_order(order):
+    """ Flips the direction of every order key """
+    return [key[1:] if key.startswith('-') else '-' + key for key in order]
+
+
+def nullable_keys(model, order):
+    """
+    Returns the fields of the order keys that may hold NULL: nullable
+    fields, fields reached through a nullable or multi valued relation,
+    and keys that are not model fields (eg: annotations).
+    """
+    nullable = set()
+    for key in order:
+        field_name = key.lstrip('-')
+        opts = model._meta
+        for part in field_name.split(LOOKUP_SEP):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                if part != 'pk':
+                    nullable.add(field_name)
+                break
+            if field.null or field.many_to_many or field.one_to_many or (
+                    field.one_to_one and field.auto_created):
+                nullable.add(field_name)
+                break
+            if not field.is_relation:
+                break
+            opts = field.related_model._meta
+    return nullable
+
+
+def order_expressions(order, nulls_first=False):
+    """
+    Returns the order_by expressions of order, with NULLs sorted last (or
+    first, when walking backwards) whatever the database does by default,
+    as seek_filter expects.
+    """
+    nulls = {'nulls_first': True} if nulls_first else {'nulls_last': True}
+    return [
+        F(key[1:]).desc(**nulls) if key.startswith('-') else F(key).asc(**nulls)
+        for key in order
+    ]
+
+
+def seek_filter(order, values, nullable=(), nulls_first=False):
+    """
+    Builds the seek predicate for rows after `values` in `order`:
+
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+
+    Each branch is a range condition on a prefix of the order keys, so
+    the database can start reading an index at the cursor instead of
+    scanning and discarding the skipped rows.
+
+    NULLs never compare, so the keys in `nullable` get IS NULL branches
+    matching order_expressions(order, nulls_first): with NULLs last, the
+    rows after a value include the NULLs and nothing comes after a NULL;
+    with NULLs first, every non NULL value comes after a NULL.
+    """
+    q = Q()
+    equal = {}
+    for key, value in zip(order, values):
+        field = key.lstrip('-')
+        if value is None:
+            if nulls_first:
+                q |= Q(**equal) & Q(**{field + '__isnull': False})
+            equal[field + '__isnull'] = True
+            continue
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        after = Q(**{'{0}__{1}'.format(field, lookup): value})
+        if field in nullable and not nulls_first:
+            after |= Q(**{field + '__isnull': True})
+        q |= Q(**equal) & after
+        equal[field] = value
+    return q
@@ -0,0 +1,74 @@
+"""
+Concurrent queries for WSGI deployments
+
+The counts and the page query of a draw are independent, so with
+Meta.parallel_queries they are sent together: the request thread runs the
+first one and a shared, bounded thread pool runs the others on their own
+database connections.  The pool size is set with the
+DATATABLES_QUERY_WORKERS setting (default 8).  Workers keep their
+connections as long as CONN_MAX_AGE allows: with the default of 0 each
+query opens and closes one.
+
+Queries run one after the other inside a transaction, whose uncommitted
+rows other connections cannot see, and on in-memory SQLite databases,
+which are private to their connection.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_query_executor():
+    """ Returns the thread pool shared by every table """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DATATABLES_QUERY_WORKERS', 8),
+                thread_name_prefix='django_datatables_query',
+            )
+    return _executor
+
+
+def can_run_in_parallel(using):
+    """ Whether other connections see the same data as the connection using """
+    connection = connections[using]
+    if connection.in_atomic_block:
+        return False
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return False
+    return True
+
+
+def run_query(fn, arg):
+    try:
+        return fn(arg)
+    finally:
+        # Keep the worker's connection as long as CONN_MAX_AGE allows,
+        # as a request thread would
+        for connection in connections.all():
+            connection.close_if_unusable_or_obsolete()
+
+
+def run_queries(calls, parallel=True):
+    """
+    Runs every (fn, arg) of calls and returns their results in order.
+    """
+    if not parallel or len(calls) < 2:
+        return [fn(arg) for fn, arg in calls]
+
+    executor = get_query_executor()
+    futures = [executor.submit(run_query, fn, arg) for fn, arg in calls[1:]]
+    first_fn, first_arg = calls[0]
+    try:
+        first = first_fn(first_arg)
+    finally:
+        # Do not leave queries running for a failed draw
+        wait(futures)
+    return [first] + [future.result() for future in futures]
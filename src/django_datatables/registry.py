@@ -0,0 +1,45 @@
+"""
+Registry of datatable classes
+
+Every concrete Datatable is registered under a short, stable id when its
+class is created.  The data view looks tables up by that id, so only
+registered classes can be reached from a request.
+"""
+
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+
+_registry = {}
+
+
+def get_class_path(datatable_class):
+    return '{0}.{1}'.format(datatable_class.__module__, datatable_class.__qualname__)
+
+
+def make_datatable_id(datatable_class):
+    """ Returns an id derived from the import path of the class """
+    digest = hashlib.sha1(get_class_path(datatable_class).encode('utf-8')).hexdigest()
+    return '{0}-{1}'.format(datatable_class.__name__, digest[:8])
+
+
+def register(datatable_class, datatable_id=None):
+    """
+    Registers a datatable class under datatable_id, or an id derived from
+    its import path.  Returns the id.
+    """
+    datatable_id = datatable_id or make_datatable_id(datatable_class)
+    registered = _registry.get(datatable_id)
+    # A class defined again at the same path (eg: a reloaded module) replaces the old one
+    if registered is not None and get_class_path(registered) != get_class_path(datatable_class):
+        raise ImproperlyConfigured(
+            "Datatable id '{0}' is used by both {1} and {2}".format(
+                datatable_id, get_class_path(registered), get_class_path(datatable_class)))
+    _registry[datatable_id] = datatable_class
+    datatable_class._meta.datatable_id = datatable_id
+    return datatable_id
+
+
+def get_datatable_class(datatable_id):
+    """ Returns the class registered under datatable_id, or None """
+    return _registry.get(datatable_id)
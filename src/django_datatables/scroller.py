@@ -0,0 +1,121 @@
+"""
+Block cached pagination for the DataTables Scroller plugin
+
+With Meta.pagination = 'scroller' the primary keys of the filtered and
+ordered rows are cached in blocks of Meta.scroller_block_size keys, along
+with the counts, for Meta.scroller_timeout seconds.  A draw reads the
+blocks covering its rows (querying only the ones missing, one OFFSET
+query each), then fetches its rows with a primary key IN lookup.
+Scrolling within cached blocks never re-runs the search, the filters or
+the counts.  Once a draw is served, the blocks adjacent to it are fetched
+ahead in the query thread pool (see parallel.py).
+
+Blocks are keyed by the ordering, search, column searches and filter form
+values of the draw, get_cache_key_extra() and the cache generation of the
+table's models (see caching.py), so saving or deleting an instance
+retires them.  Changes made without signals are seen once they expire.
+"""
+
+import hashlib
+import logging
+
+from django.core.cache import caches
+
+from .caching import get_cache_models, get_generations
+from .parallel import can_run_in_parallel, get_query_executor, run_query
+
+LOG = logging.getLogger(__name__)
+
+BLOCK_KEY = 'django_datatables:scroller:{0}:{1}:{2}'
+
+
+class ScrollerBlocks(object):
+    """ The cached key blocks and counts of a draw's query """
+
+    def __init__(self, datatable, request, ordered_qs):
+        meta = datatable._meta
+        self.cache = caches[meta.get('cache_alias', 'default')]
+        self.block_size = meta.get('scroller_block_size', 500)
+        self.timeout = meta.get('scroller_timeout', 30)
+        self.prefetch_blocks = meta.get('scroller_prefetch', 1)
+        self.ordered_qs = ordered_qs
+        signature = repr((
+            datatable.params.query_signature(),
+            get_generations(self.cache, get_cache_models(meta)),
+            datatable.get_cache_key_extra(request),
+        ))
+        self.prefix = BLOCK_KEY.format(
+            meta.datatable_id, hashlib.sha1(signature.encode('utf-8')).hexdigest(), '{0}')
+
+    def key(self, name):
+        return self.prefix.format(name)
+
+    def cached(self, name, fn):
+        """ Returns fn, a count of the draw, reading its result from the cache """
+        def run(qs):
+            key = self.key(name)
+            value = self.cache.get(key)
+            if value is None:
+                value = fn(qs)
+                self.cache.set(key, value, self.timeout)
+            return value
+        return run
+
+    def fetch_block(self, index):
+        """ Queries the keys of a block, and caches them """
+        start = index * self.block_size
+        keys = list(self.ordered_qs.values_list('pk', flat=True)[start:start + self.block_size])
+        self.cache.set(self.key(index), keys, self.timeout)
+        return keys
+
+    def get_blocks(self, indexes):
+        """ Returns the key blocks of indexes, querying the ones not cached """
+        cached = self.cache.get_many([self.key(index) for index in indexes])
+        blocks = []
+        for index in indexes:
+            keys = cached.get(self.key(index))
+            blocks.append(self.fetch_block(index) if keys is None else keys)
+        return blocks
+
+    def get_keys(self, start, length):
+        """ Returns the primary keys of the rows from start to start + length """
+        first = start // self.block_size
+        last = (start + length - 1) // self.block_size
+        indexes = list(range(first, last + 1))
+        blocks = self.get_blocks(indexes)
+        self.prefetch_around(indexes, blocks)
+        keys = [key for block in blocks for key in block]
+        offset = start - first * self.block_size
+        return keys[offset:offset + length]
+
+    def fetch_page(self, qs, start, length):
+        """ Returns the values() rows of qs from start to start + length, in order """
+        keys = self.get_keys(start, length)
+        if not keys:
+            return []
+        position = {key: index for index, key in enumerate(keys)}
+        rows = list(qs.filter(pk__in=keys))
+        rows.sort(key=lambda row: position[row['pk']])
+        return rows
+
+    def prefetch(self, indexes):
+        """ Fetches the blocks of indexes that are not cached yet, stopping at the last one """
+        try:
+            for index in indexes:
+                if self.cache.get(self.key(index)) is None:
+                    if len(self.fetch_block(index)) < self.block_size:
+                        break
+        except Exception:
+            LOG.exception('Could not prefetch datatable rows')
+
+    def prefetch_around(self, indexes, blocks):
+        """ Fetches the blocks before and after a draw's blocks in the background """
+        if not self.prefetch_blocks or not can_run_in_parallel(self.ordered_qs.db):
+            return
+        ahead = []
+        if len(blocks[-1]) == self.block_size:
+            ahead = list(range(indexes[-1] + 1, indexes[-1] + 1 + self.prefetch_blocks))
+        behind = list(range(max(indexes[0] - self.prefetch_blocks, 0), indexes[0]))
+        wanted = behind[::-1] + ahead
+        if wanted:
+            get_query_executor().submit(run_query, self.prefetch, wanted)
@@ -0,0 +1,265 @@
+"""
+Search backends for the search box
+
+A backend is selected per table with Meta.search_backend, either by name
+(see SEARCH_BACKENDS), as a SearchBackend subclass or as a dotted path.
+"""
+
+import hashlib
+
+from django.db import connections, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.utils.module_loading import import_string
+
+from .compat import LOOKUPS_PARENTHESIZE_EXPRESSIONS
+
+RANK_ANNOTATION = 'search_rank'
+
+# (alias, database name, table) of the FTS5 tables known to exist
+_fts5_tables = set()
+
+# Lookups that may end a search_fields entry
+FIELD_LOOKUP_SUFFIXES = ('exact', 'contains', 'startswith', 'endswith', 'search', 'regex')
+
+
+def strip_lookup(field_lookup):
+    """ Returns the field path of a search_fields entry, without its lookup """
+    parts = field_lookup.split('__')
+    if len(parts) > 1 and parts[-1].lstrip('i') in FIELD_LOOKUP_SUFFIXES:
+        parts = parts[:-1]
+    return '__'.join(parts)
+
+
+class RawSubquery(RawSQL):
+    """
+    A raw subquery for an __in lookup, parenthesized once: SQLite reads
+    "IN ((SELECT ...))" as the first row of the subquery only.
+    """
+
+    def as_sql(self, compiler, connection):
+        if LOOKUPS_PARENTHESIZE_EXPRESSIONS:
+            return self.sql, self.params
+        return super(RawSubquery, self).as_sql(compiler, connection)
+
+
+class SearchBackend(object):
+    """
+    Filters a queryset by the search box value, and optionally ranks it.
+    """
+
+    def __init__(self, datatable):
+        self.datatable = datatable
+        self._meta = datatable._meta
+
+    @classmethod
+    def contribute_to_class(cls, datatable_class):
+        """ Called once for every datatable class using the backend """
+
+    @property
+    def search_fields(self):
+        return self._meta.get('search_fields', [])
+
+    def filter(self, qs, search):
+        raise NotImplementedError
+
+    def rank(self, qs, search):
+        """
+        Returns the queryset annotated with a relevance score and the
+        order_by key that sorts the best matches first.
+        """
+        raise NotImplementedError("{0} does not rank results".format(type(self).__name__))
+
+
+class LookupSearchBackend(SearchBackend):
+    """
+    ORs a field lookup (icontains unless given) over every search_fields entry
+    """
+
+    def filter(self, qs, search):
+        if not self.search_fields:
+            return qs
+        return qs.filter(self.datatable.filter_through_field_lookup(search))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    PostgreSQL full text search.
+
+    Searches Meta.search_vector, a SearchVectorField kept up to date by the
+    application (index it with a GIN index), or else a SearchVector built
+    from search_fields, which needs a matching GIN expression index to
+    avoid scanning the table.  Meta.search_config sets the text search
+    configuration and Meta.search_type the SearchQuery type.
+    """
+
+    def get_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = self._meta.get('search_vector')
+        if vector:
+            return vector
+        return SearchVector(
+            *[strip_lookup(field) for field in self.search_fields],
+            config=self._meta.get('search_config'))
+
+    def get_query(self, search):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(
+            search, config=self._meta.get('search_config'),
+            search_type=self._meta.get('search_type', 'plain'))
+
+    def filter(self, qs, search):
+        vector = self.get_vector()
+        if isinstance(vector, str):
+            return qs.filter(**{vector: self.get_query(search)})
+        return qs.annotate(search_vector=vector).filter(search_vector=self.get_query(search))
+
+    def rank(self, qs, search):
+        from django.contrib.postgres.search import SearchRank
+        from django.db.models import F
+
+        vector = self.get_vector()
+        if isinstance(vector, str):
+            vector = F(vector)
+        qs = qs.annotate(**{RANK_ANNOTATION: SearchRank(vector, self.get_query(search))})
+        return qs, '-' + RANK_ANNOTATION
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """
+    SQLite full text search with an FTS5 shadow table.
+
+    The table <db_table>_fts_<hash> holds the search_fields of every row of
+    Meta.model, keyed by primary key; tables searching the same model on
+    other fields get a table of their own.  It is created after migrate, or
+    on first use, and kept up to date by post_save / post_delete signals on
+    the model.  Changes that bypass signals, including changes to related
+    rows reached through joined search_fields, need rebuild().
+    """
+
+    @classmethod
+    def contribute_to_class(cls, datatable_class):
+        model = datatable_class._meta.get('model')
+        if not model or not datatable_class._meta.get('search_fields'):
+            return
+        fields = [strip_lookup(field) for field in datatable_class._meta.search_fields]
+
+        def update_row(sender, instance, **kwargs):
+            connection = connections[instance._state.db or 'default']
+            if connection.vendor == 'sqlite':
+                cls.index_rows(connection, model, fields, model._default_manager.filter(
+                    pk=instance.pk))
+
+        def delete_row(sender, instance, **kwargs):
+            connection = connections[instance._state.db or 'default']
+            if connection.vendor == 'sqlite':
+                cls.ensure_table(connection, model, fields)
+                with connection.cursor() as cursor:
+                    cursor.execute('DELETE FROM {0} WHERE rowid = %s'.format(
+                        cls.table_name(connection, model, fields)), [instance.pk])
+
+        def create_table(sender, using, **kwargs):
+            # Created outside of any transaction: SQLite does not survive
+            # rolling back the creation of a virtual table to a savepoint
+            connection = connections[using]
+            if sender.label == model._meta.app_label and connection.vendor == 'sqlite':
+                cls.ensure_table(connection, model, fields)
+
+        uid = 'django_datatables:fts5:{0}:{1}'.format(
+            model._meta.label_lower, cls.fields_hash(fields))
+        post_save.connect(update_row, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(delete_row, sender=model, weak=False, dispatch_uid=uid)
+        post_migrate.connect(create_table, weak=False, dispatch_uid=uid)
+
+    @staticmethod
+    def fields_hash(fields):
+        return hashlib.sha1(','.join(fields).encode('utf-8')).hexdigest()[:8]
+
+    @classmethod
+    def table_name(cls, connection, model, fields):
+        return connection.ops.quote_name('{0}_fts_{1}'.format(
+            model._meta.db_table, cls.fields_hash(fields)))
+
+    @classmethod
+    def ensure_table(cls, connection, model, fields):
+        """ Creates the shadow table if it does not exist """
+        table = cls.table_name(connection, model, fields)
+        key = (connection.alias, connection.settings_dict['NAME'], table)
+        if key in _fts5_tables:
+            return
+        columns = ', '.join(connection.ops.quote_name(field) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS {0} USING fts5({1})'.format(
+                table, columns))
+        # Not remembered until committed, a rolled back table is gone
+        transaction.on_commit(lambda: _fts5_tables.add(key), using=connection.alias)
+
+    @classmethod
+    def index_rows(cls, connection, model, fields, qs):
+        """ Replaces the shadow rows of every row in qs """
+        cls.ensure_table(connection, model, fields)
+        table = cls.table_name(connection, model, fields)
+        columns = ', '.join(connection.ops.quote_name(field) for field in fields)
+        placeholders = ', '.join(['%s'] * (len(fields) + 1))
+        with connection.cursor() as cursor:
+            for row in qs.values_list('pk', *fields).iterator():
+                cursor.execute('DELETE FROM {0} WHERE rowid = %s'.format(table), [row[0]])
+                cursor.execute('INSERT INTO {0} (rowid, {1}) VALUES ({2})'.format(
+                    table, columns, placeholders), list(row))
+
+    def rebuild(self, qs=None):
+        """ Re-indexes qs, or every row of Meta.model """
+        model = self._meta.model
+        qs = model._default_manager.all() if qs is None else qs
+        self.index_rows(connections[qs.db], model, self.get_fields(), qs)
+
+    def get_fields(self):
+        return [strip_lookup(field) for field in self.search_fields]
+
+    def get_match(self, search):
+        """
+        Quotes every word of the search so FTS5 query syntax in user input
+        is taken literally, and matches them as prefixes.
+        """
+        return ' '.join('"{0}"*'.format(word.replace('"', '""')) for word in search.split())
+
+    def get_match_sql(self, qs):
+        connection = connections[qs.db]
+        fields = self.get_fields()
+        self.ensure_table(connection, qs.model, fields)
+        table = self.table_name(connection, qs.model, fields)
+        return table, 'SELECT {{0}} FROM {0} WHERE {0} MATCH %s'.format(table)
+
+    def filter(self, qs, search):
+        if not self.search_fields or not search.split():
+            return qs
+        table, sql = self.get_match_sql(qs)
+        return qs.filter(pk__in=RawSubquery(sql.format('rowid'), [self.get_match(search)]))
+
+    def rank(self, qs, search):
+        connection = connections[qs.db]
+        table, sql = self.get_match_sql(qs)
+        pk_column = '{0}.{1}'.format(
+            connection.ops.quote_name(qs.model._meta.db_table),
+            connection.ops.quote_name(qs.model._meta.pk.column))
+        # bm25() scores are negative, the best match sorts first ascending
+        rank = RawSQL(
+            sql.format('rank') + ' AND rowid = {0}'.format(pk_column), [self.get_match(search)])
+        return qs.annotate(**{RANK_ANNOTATION: rank}), RANK_ANNOTATION
+
+
+SEARCH_BACKENDS = {
+    'lookup': LookupSearchBackend,
+    'postgres': PostgresSearchBackend,
+    'fts5': SQLiteFTS5SearchBackend,
+}
+
+
+def get_search_backend_class(meta):
+    """ Returns the SearchBackend class configured in Meta.search_backend """
+    backend = meta.get('search_backend', 'lookup')
+    if isinstance(backend, str):
+        backend = SEARCH_BACKENDS.get(backend) or import_string(backend)
+    return backend
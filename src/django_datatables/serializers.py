@@ -0,0 +1,108 @@
+"""
+JSON serializers for data responses
+
+Selected with the DATATABLES_JSON_SERIALIZER setting:
+
+* 'auto' (default) - orjson when it is installed, else 'django'
+* 'django' - the json module with LazyEncoder
+* 'orjson' - orjson (pip install orjson)
+
+or the dotted path of a JSONSerializer subclass.  Whatever the backend,
+the cells of the rendered rows are converted beforehand, one column at a
+time, with the conversions of DjangoJSONEncoder (dates, times, Decimals,
+UUIDs) and LazyEncoder (lazy translation strings), so every backend
+produces the same values.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from django.conf import settings
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
+from django.utils.safestring import SafeString
+
+from .export import LazyEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Types every backend encodes as they are
+NATIVE_TYPES = frozenset([str, SafeString, int, float, bool, type(None)])
+# Types converted before encoding, as the backends disagree on their format
+CONVERTED_TYPES = (datetime.date, datetime.time, datetime.timedelta, decimal.Decimal,
+                   uuid.UUID, Promise)
+
+
+def convert_rows(rows, default=LazyEncoder().default):
+    """
+    Replaces the dates, times, Decimals, UUIDs and lazy strings in a list
+    of row lists, skipping the columns that only hold json types.  Other
+    values, eg: lists and dicts, are left to the backend.
+    """
+    if not rows:
+        return rows
+    for index in range(len(rows[0])):
+        if {type(row[index]) for row in rows} <= NATIVE_TYPES:
+            continue
+        for row in rows:
+            value = row[index]
+            if type(value) not in NATIVE_TYPES and isinstance(value, CONVERTED_TYPES):
+                row[index] = default(value)
+    return rows
+
+
+class JSONSerializer(object):
+    """ Encodes a data response as bytes """
+    content_type = 'application/json'
+
+    def dumps(self, data):
+        raise NotImplementedError
+
+    def dumps_response(self, json_response):
+        data = json_response.get('data')
+        if isinstance(data, list) and data and isinstance(data[0], list):
+            convert_rows(data)
+        return self.dumps(json_response)
+
+
+class DjangoJSONSerializer(JSONSerializer):
+
+    def dumps(self, data):
+        return json.dumps(data, cls=LazyEncoder, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonSerializer(JSONSerializer):
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The orjson serializer needs orjson: pip install orjson")
+        self.default = LazyEncoder().default
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=self.default)
+
+
+SERIALIZERS = {
+    'django': DjangoJSONSerializer,
+    'orjson': OrjsonSerializer,
+}
+
+_serializers = {}
+
+
+def get_serializer():
+    """ Returns the JSONSerializer configured in DATATABLES_JSON_SERIALIZER """
+    name = getattr(settings, 'DATATABLES_JSON_SERIALIZER', 'auto')
+    serializer = _serializers.get(name)
+    if serializer is None:
+        if name == 'auto':
+            serializer_class = OrjsonSerializer if orjson is not None else DjangoJSONSerializer
+        else:
+            serializer_class = SERIALIZERS.get(name) or import_string(name)
+        serializer = _serializers[name] = serializer_class()
+    return serializer
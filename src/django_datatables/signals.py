@@ -0,0 +1,15 @@
+"""
+Signals sent by datatables
+"""
+
+from django.dispatch import Signal
+
+# Sent by the datatable class when a query of a draw runs longer than its
+# slow query threshold, with the arguments: datatable, phase, sql, params,
+# duration (milliseconds) and plan (the EXPLAIN output, or None)
+slow_query = Signal()
+
+# Sent by the datatable class after a draw when Meta.timing is set, with the
+# arguments: datatable, name (the class name) and timings (milliseconds
+# spent in each phase, see timing.py)
+datatable_timed = Signal()
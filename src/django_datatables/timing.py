@@ -0,0 +1,102 @@
+"""
+Per phase timings of a draw
+
+With Meta.timing (or the DATATABLES_TIMING setting) the phases of a draw
+are timed with perf_counter_ns:
+
+* validate - the fingerprint of a conditional request, see conditional.py
+* initial - get_initial_queryset
+* search - applying the search box
+* filter - applying the column searches and the filter form
+* count_total - the unfiltered count
+* count_filtered - the filtered count
+* page - ordering, paging and fetching the page rows
+* render - rendering the rows
+* serialize - encoding the json response
+
+Building querysets is lazy, so the SQL time of the search and filters is
+part of the count and page phases.  The timings are sent in a
+Server-Timing header, for the browser's developer tools, and with the
+datatable_timed signal.  Counts and the page query may run concurrently,
+in which case their timings overlap.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import time
+
+from django.conf import settings
+
+from .signals import datatable_timed
+
+
+class NullTimings(object):
+    """ Does not time anything """
+    enabled = False
+
+    def phase(self, name):
+        return nullcontext()
+
+    def wrap(self, name, fn):
+        return fn
+
+    def awrap(self, name, fn):
+        return fn
+
+
+class Timings(NullTimings):
+    """ Total nanoseconds spent in each phase """
+    enabled = True
+
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    def add(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0) + duration
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter_ns() - start)
+
+    def wrap(self, name, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return fn(*args, **kwargs)
+        return timed
+
+    def awrap(self, name, fn):
+        @wraps(fn)
+        async def timed(*args, **kwargs):
+            with self.phase(name):
+                return await fn(*args, **kwargs)
+        return timed
+
+    def as_milliseconds(self):
+        return OrderedDict((name, duration / 1e6) for name, duration in self.phases.items())
+
+    def server_timing(self):
+        """ Returns the value of a Server-Timing header """
+        return ', '.join(
+            '{0};dur={1:.3f}'.format(name, duration)
+            for name, duration in self.as_milliseconds().items())
+
+    def report(self, datatable, response):
+        if self.phases:
+            response['Server-Timing'] = self.server_timing()
+        datatable_timed.send(
+            sender=type(datatable), datatable=datatable, name=type(datatable).__name__,
+            timings=self.as_milliseconds(),
+        )
+
+
+def get_timings(datatable):
+    """ Returns the Timings of a draw, or a NullTimings when disabled """
+    if datatable._meta.get('timing', False) or getattr(settings, 'DATATABLES_TIMING', False):
+        return Timings()
+    return NullTimings()
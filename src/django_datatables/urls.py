@@ -3,10 +3,16 @@ try:
 except ImportError:
     from django.conf.urls import re_path
 
-from .views import datatable_manager
+from .views import (
+    async_datatable_manager, datatable_manager, export_download, export_status,
+)
 
 app_name = 'django_datatables'
 
 urlpatterns = [
-    re_path(r'^data/$', datatable_manager, name="datatable_manager")
+    re_path(r'^data/$', datatable_manager, name="datatable_manager"),
+    re_path(r'^data/async/$', async_datatable_manager, name="async_datatable_manager"),
+    re_path(r'^export/(?P<job_id>[0-9a-f]{32})/$', export_status, name="export_status"),
+    re_path(r'^export/(?P<job_id>[0-9a-f]{32})/download/$', export_download,
+            name="export_download"),
 ]
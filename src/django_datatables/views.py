@@ -1,19 +1,90 @@
-from .views import *
+import asyncio
 
-import importlib
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
+
+from .jobs import DONE, ExportJob, get_owner
+from .registry import get_datatable_class
+
+
+def get_datatable(request):
+    """ Returns an instance of the datatable named by the table parameter """
+    cls = get_datatable_class(request.GET.get("table"))
+    if cls is None:
+        raise Http404("Unknown datatable")
+    instance = cls()
+    instance.request = request
+    return instance
+
+
+async def await_response(response):
+    return await response
 
 
 def datatable_manager(request):
     """
     Return the json data for a datatable
     """
-    module_name = request.GET.get("module")
-    name = request.GET.get("name")
-    if not module_name or not name:
-        return None
-    module = importlib.import_module(module_name)
-    cls = getattr(module, name)
-    instance = cls()
-    instance.request = request
+    instance = get_datatable(request)
+    view_method = instance.dispatch
+    response = view_method(request)
+    if asyncio.iscoroutine(response):
+        # An AsyncDatatable
+        response = async_to_sync(await_response)(response)
+    return response
+
+
+async def async_datatable_manager(request):
+    """
+    Return the json data for a datatable, from an async view
+    """
+    instance = get_datatable(request)
     view_method = instance.dispatch
-    return view_method(request)
+    if asyncio.iscoroutinefunction(view_method):
+        return await view_method(request)
+    # A synchronous dispatch, or a permission mixin checking request.user
+    # before handing over to an async dispatch
+    response = await sync_to_async(view_method)(request)
+    if asyncio.iscoroutine(response):
+        response = await response
+    return response
+
+
+def get_export_job(request, job_id):
+    """ Returns the export job, if it belongs to the requesting user """
+    job = ExportJob.load(job_id)
+    if job is None or job.owner != get_owner(request):
+        raise Http404("No such export")
+    return job
+
+
+def export_status(request, job_id):
+    """
+    Return the progress of a background export
+    """
+    job = get_export_job(request, job_id)
+    status = {
+        'job': job.id,
+        'state': job.state,
+        'rows_done': job.rows_done,
+        'rows_total': job.rows_total,
+    }
+    if job.state == DONE:
+        status['download_url'] = reverse('django_datatables:export_download', args=[job.id])
+    if job.error:
+        status['error'] = job.error
+    response = JsonResponse(status)
+    add_never_cache_headers(response)
+    return response
+
+
+def export_download(request, job_id):
+    """
+    Return the file of a finished background export
+    """
+    job = get_export_job(request, job_id)
+    if job.state != DONE:
+        raise Http404("Export is not finished")
+    return FileResponse(open(job.path, 'rb'), as_attachment=True, filename=job.filename)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the draw pipeline
+
+Runs a set of draws and an export against synthetic Employee tables of
+10k, 100k and 1M rows in SQLite, and reports for each scenario the median
+time of a draw, the time spent in each phase (see django_datatables.timing),
+the number of queries and the peak memory allocated.
+
+    cd tests
+    python benchmark.py --rows 10000 100000 --save baseline.json
+    python benchmark.py --rows 10000 100000 --compare baseline.json
+
+Datasets are generated once into --db-dir and reused.  With --compare the
+exit status is 1 when a scenario is slower than the baseline by more than
+--tolerance percent.
+"""
+
+import argparse
+from datetime import date, timedelta
+import json
+import os
+import platform
+import random
+import statistics
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+sys.path.insert(0, HERE)
+
+SIZES = [10000, 100000, 1000000]
+SCENARIOS = [
+    'first_page', 'deep_page', 'search', 'multi_sort', 'links', 'render_methods', 'export',
+]
+
+SYLLABLES = ['ka', 'ma', 'ri', 'to', 'la', 'ne', 'sa', 'vi', 'do', 'ru', 'be', 'lo']
+
+_tables = None
+
+
+def get_tables():
+    """ Returns the benchmarked datatable classes, defined once Django is set up """
+    global _tables
+    if _tables is not None:
+        return _tables
+
+    from django_datatables import column, datatable
+    from sample.models import Employee
+
+    class BenchmarkDatatable(datatable.Datatable):
+        first_name = column.TextColumn()
+        last_name = column.TextColumn()
+        birthday = column.DateColumn()
+        start_date = column.DateColumn()
+        manager = column.TextColumn(value='manager__last_name')
+
+        class Meta:
+            model = Employee
+            order_columns = ['first_name', 'last_name', 'birthday', 'start_date']
+            searching = True
+            search_fields = ['first_name', 'last_name']
+            datatable_id = 'benchmark'
+
+    class LinkBenchmarkDatatable(BenchmarkDatatable):
+        first_name = column.TextColumn(link='employee_detail', link_args=['id'])
+        last_name = column.TextColumn(link='employee_detail', link_args=['id'])
+
+        class Meta:
+            datatable_id = 'benchmark-links'
+
+    class RenderBenchmarkDatatable(BenchmarkDatatable):
+        name = column.StringColumn()
+
+        @datatable.depends_on('first_name', 'last_name')
+        def render_name(self, row):
+            return "{} {}".format(row['first_name'], row['last_name'])
+
+        def render_last_name(self, value):
+            return value.upper()
+
+        def render_manager(self, value):
+            return value or "-"
+
+        class Meta:
+            datatable_id = 'benchmark-render'
+
+    _tables = {
+        'plain': BenchmarkDatatable,
+        'links': LinkBenchmarkDatatable,
+        'render': RenderBenchmarkDatatable,
+    }
+    return _tables
+
+
+def get_scenario(name, rows):
+    """ Returns the table and request parameters of a scenario """
+    tables = get_tables()
+    first_page = {'draw': 1, 'start': 0, 'length': 25,
+                  'order[0][column]': 2, 'order[0][dir]': 'asc'}
+    scenarios = {
+        'first_page': (tables['plain'], first_page),
+        'deep_page': (tables['plain'], dict(first_page, start=max(rows - 25, 0))),
+        'search': (tables['plain'], dict(first_page, **{'search[value]': 'kama'})),
+        'multi_sort': (tables['plain'], dict(first_page, **{
+            'order[1][column]': 1, 'order[1][dir]': 'desc'})),
+        'links': (tables['links'], first_page),
+        'render_methods': (tables['render'], first_page),
+        'export': (tables['plain'], {'export': 'csv', 'order[0][column]': 2}),
+    }
+    return scenarios[name]
+
+
+def make_name(rng):
+    return ''.join(rng.choice(SYLLABLES) for i in range(rng.randint(2, 4))).title()
+
+
+def populate(rows, seed=0, batch_size=10000):
+    """
+    Inserts rows Employees.  One in a hundred is a manager of the others.
+    """
+    from django.db import connection, transaction
+    from sample.models import Employee
+
+    rng = random.Random(seed)
+    managers = max(rows // 100, 1)
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {0} ({1}) VALUES ({2})'.format(
+        quote(Employee._meta.db_table),
+        ', '.join(quote(name) for name in (
+            'id', 'first_name', 'last_name', 'birthday', 'start_date', 'manager_id')),
+        ', '.join(['%s'] * 6),
+    )
+    epoch = date(1950, 1, 1)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for batch_start in range(1, rows + 1, batch_size):
+            batch = []
+            for pk in range(batch_start, min(batch_start + batch_size, rows + 1)):
+                birthday = epoch + timedelta(days=rng.randint(0, 18000))
+                batch.append((
+                    pk, make_name(rng), make_name(rng), birthday,
+                    birthday + timedelta(days=rng.randint(6500, 16000)),
+                    None if pk <= managers else rng.randint(1, managers),
+                ))
+            cursor.executemany(sql, batch)
+
+
+def use_database(path, rows, rebuild=False):
+    """ Points the default connection at the dataset of rows, creating it if needed """
+    from django.core.management import call_command
+    from django.db import connections
+    from sample.models import Employee
+
+    if rebuild and os.path.exists(path):
+        os.remove(path)
+    connection = connections['default']
+    connection.close()
+    # As the test runner does with the test database
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    if Employee.objects.count() != rows:
+        Employee.objects.all().delete()
+        populate(rows)
+
+
+def run_once(datatable_class, params):
+    """ Runs a draw or an export, returns its time in ms and its datatable """
+    from django.test import RequestFactory
+    from django_datatables.timing import Timings
+
+    request = RequestFactory().get('/', params)
+    datatable = datatable_class()
+    datatable.request = request
+    datatable.timings = Timings()
+
+    start = time.perf_counter_ns()
+    if 'export' in params:
+        with datatable.timings.phase('export'):
+            response = datatable.create_csv_response(request)
+            for line in response.streaming_content:
+                pass
+    else:
+        context = datatable.get_context_data(request)
+        if 'error' in context:
+            raise RuntimeError("{0} failed, see the logged exception".format(
+                datatable_class.__name__))
+        datatable.create_data_response(context, request)
+    return (time.perf_counter_ns() - start) / 1e6, datatable
+
+
+def run_scenario(name, rows, repeat=5):
+    """ Returns the results of a scenario: median times, queries and peak memory """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    datatable_class, params = get_scenario(name, rows)
+
+    # Warm up caches and count the queries
+    with CaptureQueriesContext(connection) as queries:
+        run_once(datatable_class, params)
+
+    totals = []
+    phases = {}
+    for i in range(repeat):
+        total, datatable = run_once(datatable_class, params)
+        totals.append(total)
+        for phase, duration in datatable.timings.as_milliseconds().items():
+            phases.setdefault(phase, []).append(duration)
+
+    # Traced separately, tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        run_once(datatable_class, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'total_ms': round(statistics.median(totals), 3),
+        'phases_ms': {phase: round(statistics.median(durations), 3)
+                      for phase, durations in phases.items()},
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(sizes, scenarios, repeat, db_dir, rebuild=False, report=print):
+    results = {}
+    for rows in sizes:
+        use_database(os.path.join(db_dir, 'employees-{0}.sqlite3'.format(rows)), rows, rebuild)
+        report('{0} rows'.format(rows))
+        results[str(rows)] = {}
+        for name in scenarios:
+            result = results[str(rows)][name] = run_scenario(name, rows, repeat)
+            report('  {0:<15} {1:>10.2f} ms {2:>3} queries {3:>10.1f} KiB  {4}'.format(
+                name, result['total_ms'], result['queries'], result['peak_kb'],
+                ' '.join('{0}={1:.2f}'.format(phase, duration)
+                         for phase, duration in result['phases_ms'].items())))
+    return results
+
+
+def get_environment():
+    import django
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance, report=print):
+    """ Reports the change of every scenario against baseline, returns the regressions """
+    regressions = []
+    report('Compared to baseline')
+    for rows, scenarios in results.items():
+        for name, result in scenarios.items():
+            base = baseline.get(rows, {}).get(name)
+            if not base or not base['total_ms']:
+                continue
+            change = (result['total_ms'] - base['total_ms']) / base['total_ms'] * 100
+            slower = change > tolerance
+            report('  {0:>8} {1:<15} {2:>10.2f} ms -> {3:>10.2f} ms {4:+7.1f}%{5}'.format(
+                rows, name, base['total_ms'], result['total_ms'], change,
+                '  REGRESSION' if slower else ''))
+            if slower:
+                regressions.append((rows, name, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db-dir', default=os.path.join(
+        tempfile.gettempdir(), 'django_datatables_benchmark'))
+    parser.add_argument('--rebuild', action='store_true', help="regenerate the datasets")
+    parser.add_argument('--save', help="write the results to this json file")
+    parser.add_argument('--compare', help="compare the results to this json file")
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help="percent slower than the baseline counted as a regression")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    results = run(args.rows, args.scenario, args.repeat, args.db_dir, args.rebuild)
+
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump({'environment': get_environment(), 'results': results}, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline)['results'], args.tolerance)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conf.settings')
+    import django
+    django.setup()
+    sys.exit(main())
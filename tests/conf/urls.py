@@ -24,5 +24,6 @@ from sample import views_sample
 urlpatterns = [
     re_path(r'^$', views_sample.employee_list, name='employee_list'),
     re_path(r'^secure/$', views_sample.secure_employee_list, name='secure_employee_list'),
+    re_path(r'^employee/(?P<pk>\d+)/$', views_sample.employee_detail, name='employee_detail'),
     re_path(r'^__django_datatables__/', include('django_datatables.urls')),
 ]
@@ -0,0 +1,12 @@
+from django_datatables import column, datatable
+
+from .models import Employee
+
+
+class ManagerListDatatable(datatable.Datatable):
+    """ Only imported by the autodiscovery of the datatables modules """
+    last_name = column.TextColumn()
+
+    class Meta:
+        model = Employee
+        datatable_id = 'managers'
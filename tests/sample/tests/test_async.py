@@ -0,0 +1,112 @@
+import json
+import threading
+from unittest import mock, skipIf
+
+import django
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from model_bakery import baker
+
+from django_datatables import datatable, parallel
+from sample.views_sample import EmployeeListDatatable
+
+
+class AsyncEmployeeListDatatable(datatable.AsyncDatatable, EmployeeListDatatable):
+
+    class Meta:
+        count_strategy = 'skip_unfiltered'
+
+
+class WindowAsyncEmployeeListDatatable(AsyncEmployeeListDatatable):
+
+    class Meta:
+        count_strategy = 'window'
+
+
+class ParallelAsyncEmployeeListDatatable(AsyncEmployeeListDatatable):
+
+    class Meta:
+        parallel_queries = True
+
+
+@skipIf(django.VERSION < (4, 1), "the async ORM needs Django 4.1")
+class TestAsyncDatatable(TestCase):
+
+    def setUp(self):
+        baker.make('sample.Employee', first_name='Ann', last_name='Smith', _quantity=3)
+        baker.make('sample.Employee', first_name='Bob', last_name='Jones', _quantity=2)
+
+    def get_request(self, **params):
+        params.setdefault('draw', 1)
+        return RequestFactory().get('/', params)
+
+    async def test_matches_sync_response(self):
+        for params in ({}, {'additional_data': 'last_name=Jones'}, {'start': 2, 'length': 2}):
+            request = self.get_request(**params)
+            table = AsyncEmployeeListDatatable()
+            table.request = request
+            data = await table.aget_context_data(request)
+            self.assertNotIn('error', data)
+
+            expected = EmployeeListDatatable()
+            expected.request = request
+            self.assertEqual(data, await sync_to_async(expected.get_context_data)(request))
+
+    async def test_window_count(self):
+        for start, filtered in ((0, 2), (10, 2)):
+            request = self.get_request(additional_data='last_name=Jones', start=start)
+            table = WindowAsyncEmployeeListDatatable()
+            table.request = request
+            data = await table.aget_context_data(request)
+            self.assertEqual((data['recordsTotal'], data['recordsFiltered']), (5, filtered))
+
+    async def test_async_view(self):
+        url = reverse('django_datatables:async_datatable_manager')
+        response = await self.async_client.get(url, {
+            'table': AsyncEmployeeListDatatable._meta.datatable_id, 'draw': 3})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual((data['draw'], data['recordsTotal'], len(data['data'])), (3, 5, 5))
+
+    def test_sync_view_serves_async_table(self):
+        url = reverse('django_datatables:datatable_manager')
+        response = self.client.get(url, {
+            'table': AsyncEmployeeListDatatable._meta.datatable_id, 'draw': 1})
+        self.assertEqual(json.loads(response.content)['recordsTotal'], 5)
+
+    def test_renders_async_data_url(self):
+        html = AsyncEmployeeListDatatable().render()
+        self.assertIn(reverse('django_datatables:async_datatable_manager'), html)
+
+
+class TestAsyncParallelDraw(TransactionTestCase):
+    """ Committed rows, visible to the worker connections """
+
+    # The shared cache in-memory test database is seen by every connection
+    @mock.patch('django_datatables.datatable.can_run_in_parallel', return_value=True)
+    def test_queries_in_threads(self, can_run):
+        baker.make('sample.Employee', last_name='Smith', _quantity=3)
+        baker.make('sample.Employee', last_name='Jones', _quantity=2)
+        request = RequestFactory().get('/', {
+            'draw': 1, 'length': 2, 'additional_data': 'last_name=Jones'})
+        # Only passed when the total count, the filtered count and the page
+        # query run at the same time
+        barrier = threading.Barrier(3, timeout=5)
+
+        def run_query(fn, arg):
+            barrier.wait()
+            return parallel.run_query(fn, arg)
+
+        table = ParallelAsyncEmployeeListDatatable()
+        table.request = request
+        with mock.patch('django_datatables.datatable.run_query', side_effect=run_query):
+            data = async_to_sync(table.aget_context_data)(request)
+        self.assertNotIn('error', data)
+        self.assertEqual((data['recordsTotal'], data['recordsFiltered']), (5, 2))
+
+        expected = EmployeeListDatatable()
+        expected.request = request
+        self.assertEqual(data, expected.get_context_data(request))
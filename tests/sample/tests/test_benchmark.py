@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+import benchmark
+
+
+class TestBenchmark(TestCase):
+
+    def test_scenarios(self):
+        benchmark.populate(60, batch_size=25)
+        for name in benchmark.SCENARIOS:
+            result = benchmark.run_scenario(name, 60, repeat=1)
+            self.assertGreater(result['total_ms'], 0)
+            self.assertGreater(result['peak_kb'], 0)
+            self.assertGreaterEqual(result['queries'], 1)
+        self.assertIn('render', benchmark.run_scenario('links', 60, repeat=1)['phases_ms'])
+
+    def test_compare(self):
+        baseline = {'10000': {'search': {'total_ms': 10.0}, 'export': {'total_ms': 10.0}}}
+        results = {'10000': {'search': {'total_ms': 12.0}, 'export': {'total_ms': 10.5}}}
+        regressions = benchmark.compare(results, baseline, tolerance=10, report=lambda line: None)
+        self.assertEqual([(rows, name) for rows, name, change in regressions], [('10000', 'search')])
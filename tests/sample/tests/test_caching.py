@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from model_bakery import baker
+
+from sample.views_sample import EmployeeListDatatable
+
+
+class CachedEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        cache = True
+
+
+class TestResponseCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        baker.make('sample.Employee', _quantity=2)
+
+    def get_datatable(self, draw, **params):
+        params.update({
+            'table': CachedEmployeeDatatable._meta.datatable_id,
+            'draw': draw,
+            'length': 10,
+        })
+        return self.client.get(reverse('django_datatables:datatable_manager'), params).json()
+
+    def test_cache_hit_and_invalidation(self):
+        first = self.get_datatable(1)
+        with self.assertNumQueries(0):
+            second = self.get_datatable(2)
+        self.assertEqual(second['draw'], 2)
+        self.assertEqual(second['data'], first['data'])
+
+        # A different page is a different entry
+        with self.assertNumQueries(3):
+            self.get_datatable(3, start=1)
+
+        baker.make('sample.Employee')
+        self.assertEqual(self.get_datatable(4)['recordsTotal'], 3)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test import TestCase
+
+from model_bakery import baker
+
+from django_datatables import cancellation
+from django_datatables.cancellation import DrawGuard, DrawSuperseded, StatementTimeout
+from sample.tests.utils import get_table
+from sample.views_sample import EmployeeListDatatable
+
+SLOW_SQL = '''
+    WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000)
+    SELECT count(*) FROM c
+'''
+
+
+class SupersededEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        supersede_draws = True
+        statement_timeout = 5000
+
+
+def slow_query():
+    with connection.cursor() as cursor:
+        cursor.execute(SLOW_SQL)
+        return cursor.fetchone()
+
+
+class TestDrawSupersession(TestCase):
+
+    def test_newer_draw_supersedes(self):
+        with DrawGuard('key', 1) as first:
+            with DrawGuard('key', 2) as second:
+                self.assertTrue(first.superseded)
+                self.assertFalse(second.superseded)
+                with self.assertRaises(DrawSuperseded):
+                    first.wrap(self.fail, 'default')()
+                # An older draw arriving late is superseded at once
+                with DrawGuard('key', 1) as late:
+                    self.assertTrue(late.superseded)
+                with DrawGuard('other', 1) as other:
+                    self.assertFalse(other.superseded)
+        self.assertEqual(cancellation._draws, {})
+
+    def test_cancels_running_query(self):
+        with DrawGuard('key', 1) as guard:
+            threading.Timer(0.05, guard.cancel).start()
+            start = time.monotonic()
+            with self.assertRaises(DrawSuperseded):
+                guard.wrap(slow_query, 'default')()
+            self.assertLess(time.monotonic() - start, 5)
+
+    def test_statement_timeout(self):
+        with self.assertRaises(StatementTimeout):
+            with DrawGuard(None, 1, timeout=50) as guard:
+                guard.wrap(slow_query, 'default')()
+        # The connection is usable afterwards
+        self.assertEqual(connection.cursor().execute('SELECT 1').fetchone(), (1,))
+
+    def draw(self, session, number, client='page'):
+        params = {'draw': number}
+        if client:
+            params['client'] = client
+        table = get_table(SupersededEmployeeDatatable, **params)
+        table.request.session = session
+        return table.get_context_data(table.request)
+
+    def test_superseded_response(self):
+        baker.make('sample.Employee', _quantity=2)
+        session = SessionStore()
+        session.create()
+
+        self.assertEqual(len(self.draw(session, 1)['data']), 2)
+        key = (session.session_key, SupersededEmployeeDatatable._meta.datatable_id, 'page')
+        with DrawGuard(key, 3), self.assertNumQueries(0):
+            response = self.draw(session, 2)
+        self.assertEqual(response, {
+            'draw': 2, 'recordsTotal': 0, 'recordsFiltered': 0, 'data': [], 'superseded': True})
+
+    def test_other_page_loads_are_not_superseded(self):
+        baker.make('sample.Employee', _quantity=2)
+        session = SessionStore()
+        session.create()
+
+        key = (session.session_key, SupersededEmployeeDatatable._meta.datatable_id, 'page')
+        with DrawGuard(key, 3):
+            # A reloaded page, or another tab, counts its draws from 1 again
+            self.assertEqual(len(self.draw(session, 1, client='reloaded')['data']), 2)
+            # Draws without a client id can not be compared
+            self.assertEqual(len(self.draw(session, 1, client=None)['data']), 2)
@@ -0,0 +1,88 @@
+from unittest import mock, skipIf
+
+import django
+
+from django.core.cache import cache
+from django.core.exceptions import FieldError
+from django.test import TestCase
+from django.urls import reverse
+
+from model_bakery import baker
+
+from django_datatables import datatable
+from sample.models import Employee
+from sample.views_sample import EmployeeListDatatable
+
+
+class ConditionalEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        conditional = True
+
+
+class UpdatedEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        conditional = True
+        updated_field = 'start_date'
+
+
+class AsyncConditionalEmployeeDatatable(datatable.AsyncDatatable, ConditionalEmployeeDatatable):
+    pass
+
+
+class TestConditionalRequests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        baker.make('sample.Employee', _quantity=3)
+
+    def get(self, datatable_class, etag=None, view='datatable_manager', **params):
+        params.update({'table': datatable_class._meta.datatable_id, 'draw': 1})
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('django_datatables:' + view), params, **headers)
+
+    def test_generations(self):
+        response = self.get(ConditionalEmployeeDatatable)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(ConditionalEmployeeDatatable, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        # Another page has another ETag
+        self.assertEqual(self.get(ConditionalEmployeeDatatable, etag, start=1).status_code, 200)
+
+        Employee.objects.first().save()
+        response = self.get(ConditionalEmployeeDatatable, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_updated_field(self):
+        etag = self.get(UpdatedEmployeeDatatable)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(UpdatedEmployeeDatatable, etag).status_code, 304)
+
+        Employee.objects.first().delete()
+        self.assertEqual(self.get(UpdatedEmployeeDatatable, etag).status_code, 200)
+
+    @skipIf(django.VERSION < (4, 1), "the async ORM needs Django 4.1")
+    def test_async(self):
+        view = 'async_datatable_manager'
+        etag = self.get(AsyncConditionalEmployeeDatatable, view=view)['ETag']
+        response = self.get(AsyncConditionalEmployeeDatatable, etag, view=view)
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_etag_on_errors(self):
+        tables = [(ConditionalEmployeeDatatable, 'datatable_manager')]
+        if django.VERSION >= (4, 1):
+            tables.append((AsyncConditionalEmployeeDatatable, 'async_datatable_manager'))
+        for datatable_class, view in tables:
+            with mock.patch.object(
+                    datatable_class, 'get_initial_queryset', side_effect=FieldError('broken')):
+                response = self.get(datatable_class, view=view)
+            self.assertIn('error', response.json())
+            self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,105 @@
+from unittest import mock, skipIf
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from model_bakery import baker
+
+from django_datatables import datatable
+from django_datatables.counting import EstimatedCount
+from sample.models import Employee
+from sample.tests.utils import adraw, draw
+from sample.views_sample import EmployeeListDatatable
+
+
+def counted(count_strategy, base=EmployeeListDatatable):
+    return type('CountedDatatable', (base,), {
+        'Meta': type('Meta', (), {'count_strategy': count_strategy}),
+    })
+
+
+class AsyncEmployeeListDatatable(datatable.AsyncDatatable, EmployeeListDatatable):
+
+    class Meta:
+        abstract = True
+
+
+class TestCountStrategies(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        baker.make('sample.Employee', last_name='Smith', _quantity=3)
+        baker.make('sample.Employee', last_name='Jones', _quantity=2)
+
+    def assertCounts(self, strategy, queries, **params):
+        with CaptureQueriesContext(connection) as captured:
+            data = draw(counted(strategy), length=2, **params)
+        self.assertEqual(len(captured), queries, [q['sql'] for q in captured])
+        self.assertNotIn('recordsApproximate', data)
+        return data['recordsTotal'], data['recordsFiltered']
+
+    def test_exact(self):
+        self.assertEqual(self.assertCounts('exact', 3), (5, 5))
+
+    def test_skip_unfiltered(self):
+        self.assertEqual(self.assertCounts('skip_unfiltered', 2), (5, 5))
+        self.assertEqual(self.assertCounts(
+            'skip_unfiltered', 3, additional_data='last_name=Smith'), (5, 3))
+
+    def test_cached(self):
+        self.assertEqual(self.assertCounts('cached', 2), (5, 5))
+        self.assertEqual(self.assertCounts('cached', 1), (5, 5))
+
+    def test_window(self):
+        self.assertEqual(self.assertCounts(
+            'window', 2, additional_data='last_name=Jones'), (5, 2))
+        self.assertEqual(self.assertCounts(
+            'window', 3, additional_data='last_name=Jones', start=10), (5, 2))
+
+    def test_estimate_counts_exactly_on_sqlite(self):
+        self.assertEqual(self.assertCounts('estimate', 2), (5, 5))
+
+    def test_cached_empty_queryset(self):
+        class EmptyDatatable(EmployeeListDatatable):
+            def get_initial_queryset(self, request):
+                return Employee.objects.filter(pk__in=[])
+
+        data = draw(counted('cached', base=EmptyDatatable))
+        self.assertEqual((data['recordsTotal'], data['recordsFiltered']), (0, 0))
+
+
+@skipIf(django.VERSION < (4, 1), "the async ORM needs Django 4.1")
+class TestAsyncCountStrategies(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        baker.make('sample.Employee', last_name='Smith', _quantity=3)
+        baker.make('sample.Employee', last_name='Jones', _quantity=2)
+
+    async def test_same_counts(self):
+        for strategy in ('exact', 'skip_unfiltered', 'cached', 'estimate', 'window'):
+            for params in ({}, {'additional_data': 'last_name=Jones'}):
+                data = await adraw(
+                    counted(strategy, base=AsyncEmployeeListDatatable), length=2, **params)
+                expected = await sync_to_async(draw)(counted(strategy), length=2, **params)
+                self.assertEqual(data, expected, strategy)
+
+    async def test_cached(self):
+        await adraw(counted('cached', base=AsyncEmployeeListDatatable), length=2)
+        # The count is read from the cache
+        with mock.patch.object(QuerySet, 'count', side_effect=AssertionError), \
+                mock.patch.object(QuerySet, 'acount', side_effect=AssertionError):
+            data = await adraw(counted('cached', base=AsyncEmployeeListDatatable), length=2)
+        self.assertEqual(data['recordsTotal'], 5)
+
+    async def test_estimate(self):
+        with mock.patch.object(EstimatedCount, 'estimate', autospec=True,
+                               side_effect=lambda strategy, qs: qs.count()) as estimate:
+            data = await adraw(counted('estimate', base=AsyncEmployeeListDatatable), length=2)
+        self.assertEqual(estimate.call_count, 1)
+        self.assertEqual(data['recordsTotal'], 5)
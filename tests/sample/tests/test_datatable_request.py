@@ -0,0 +1,32 @@
+from django.http import QueryDict
+from django.test import SimpleTestCase
+
+from django_datatables.datatable_request import DatatableRequest, Order
+
+
+class TestDatatableRequest(SimpleTestCase):
+
+    def test_parse(self):
+        params = DatatableRequest(QueryDict(
+            'draw=3&start=20&length=10&search[value]=ada&search[regex]=false'
+            '&columns[0][data]=0&columns[1][data]=1&columns[1][search][value]=1980'
+            '&columns[1][orderable]=false&columns[1][visible]=false&columns[9][data]=9'
+            '&order[1][column]=0&order[1][dir]=asc&order[0][column]=1&order[0][dir]=desc'
+            '&order[2][column]=7&order[2][dir]=asc'
+            '&additional_data=last_name__icontains%3Dking&client=k3x9'
+        ), column_count=4)
+
+        self.assertEqual((params.draw, params.start, params.length), (3, 20, 10))
+        self.assertEqual(params.search_value, 'ada')
+        self.assertEqual([c.index for c in params.columns], [0, 1])
+        self.assertEqual(params.columns[1].search_value, '1980')
+        self.assertFalse(params.columns[1].orderable)
+        self.assertEqual(params.hidden_columns, {1})
+        self.assertEqual(params.order, [Order(1, True), Order(0, False)])
+        self.assertEqual(params.filter_params, {'last_name__icontains': 'king'})
+        self.assertEqual(params.client, 'k3x9')
+
+    def test_invalid_values_fall_back_to_defaults(self):
+        params = DatatableRequest(QueryDict('draw=x&start=-5&length=&order[0][column]=a'))
+        self.assertEqual((params.draw, params.start, params.length), (0, 0, 25))
+        self.assertEqual(params.order, [])
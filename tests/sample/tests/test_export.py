@@ -0,0 +1,203 @@
+import csv
+import datetime
+from decimal import Decimal
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from model_bakery import baker
+
+from django_datatables import column, datatable, jobs
+from sample.models import Employee
+from sample.views_sample import EmployeeListDatatable
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class BackgroundExportDatatable(EmployeeListDatatable):
+
+    class Meta:
+        background_export = True
+
+
+class RawExportDatatable(datatable.Datatable):
+    first_name = column.TextColumn(link='employee_detail', link_args=['id'])
+    last_name = column.TextColumn()
+    birthday = column.DateColumn()
+    icon = column.FontAwesome5Column(icon='fas fa-user')
+    constant = column.ConstantTextColumn(text='x')
+
+    def render_last_name(self, value):
+        return '<b>{}</b>'.format(value)
+
+    def export_birthday(self, value):
+        return value.year
+
+    class Meta:
+        model = Employee
+
+
+class SerializingExecutor(jobs.InlineExecutor):
+    """ Runs jobs inline with their arguments round tripped through json, as a task queue would """
+
+    def submit(self, fn, *args, **kwargs):
+        args, kwargs = json.loads(json.dumps([args, kwargs]))
+        return super(SerializingExecutor, self).submit(fn, *args, **kwargs)
+
+
+class TestExport(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            baker.make(
+                'sample.Employee', first_name='Emp', last_name=str(i),
+                birthday=datetime.date(1980, 1, 1 + i),
+            )
+
+    def export(self, export_format, **params):
+        params.update({
+            'table': EmployeeListDatatable._meta.datatable_id,
+            'export': export_format,
+            'order[0][column]': 1,
+            'order[0][dir]': 'desc',
+        })
+        response = self.client.get(reverse('django_datatables:datatable_manager'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    @skipIf(openpyxl is None, "openpyxl is not installed")
+    def test_excel(self):
+        workbook = openpyxl.load_workbook(BytesIO(self.export('excel')))
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[0], ('Name', 'Birthday', 'Start Date', 'Manager'))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][:2], ('Emp 4', datetime.datetime(1980, 1, 5)))
+
+    @skipIf(openpyxl is None, "openpyxl is not installed")
+    @override_settings(TIME_ZONE='Europe/Paris')
+    def test_excel_aware_datetime(self):
+        from django_datatables.excel import ExcelWriter
+
+        xlwriter = ExcelWriter()
+        noon = datetime.datetime(2020, 1, 1, 12, tzinfo=datetime.timezone.utc)
+        xlwriter.add_rows('Sheet', [[noon]])
+        response = xlwriter.download('export.xlsx')
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(list(workbook.active.values), [(datetime.datetime(2020, 1, 1, 13),)])
+
+    @skipIf(openpyxl is None, "openpyxl is not installed")
+    def test_excel_numbers(self):
+        from django_datatables.excel import ExcelWriter
+
+        xlwriter = ExcelWriter()
+        xlwriter.add_rows('Sheet', [[Decimal('1.25'), True, 3]])
+        response = xlwriter.download('export.xlsx')
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(list(workbook.active.values), [(1.25, True, 3)])
+
+    def test_csv(self):
+        content = self.export('csv', additional_data='last_name__in=1&last_name__in=3')
+        rows = list(csv.reader(StringIO(content.decode('utf-8'))))
+        self.assertEqual(rows, [
+            ['Name', 'Birthday', 'Start Date', 'Manager'],
+            ['Emp 3', '1980-01-04', rows[1][2], ''],
+        ])
+
+    def test_ndjson(self):
+        lines = self.export('ndjson').decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[-1])['name'], 'Emp 0')
+        self.assertEqual(json.loads(lines[-1])['manager'], None)
+
+    @override_settings(DATATABLES_EXPORT_DIR=tempfile.mkdtemp())
+    @mock.patch.object(jobs, '_executor', SerializingExecutor())
+    def test_background_export(self):
+        user = User.objects.create_user(username='test', password='test')
+        self.client.force_login(user)
+        response = self.client.get(reverse('django_datatables:datatable_manager'), {
+            'table': BackgroundExportDatatable._meta.datatable_id,
+            'export': 'csv',
+            'additional_data': 'last_name__in=1&last_name__in=3',
+        })
+        self.assertEqual(response.status_code, 202)
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual((status['rows_done'], status['rows_total']), (1, 1))
+
+        download = self.client.get(status['download_url'])
+        content = b''.join(download.streaming_content).decode('utf-8')
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual([row[0] for row in rows], ['Name', 'Emp 3'])
+
+        # Jobs are only visible to whoever started them
+        self.client.logout()
+        self.assertEqual(self.client.get(response.json()['status_url']).status_code, 404)
+
+    @override_settings(DATATABLES_EXPORT_DIR=tempfile.mkdtemp())
+    @mock.patch.object(jobs, '_executor', SerializingExecutor())
+    def test_background_export_failure(self):
+        with mock.patch.object(
+                BackgroundExportDatatable, 'get_initial_queryset',
+                side_effect=ValueError('secret detail')):
+            response = self.client.get(reverse('django_datatables:datatable_manager'), {
+                'table': BackgroundExportDatatable._meta.datatable_id,
+                'export': 'csv',
+            })
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['state'], 'failed')
+        self.assertEqual(status['error'], jobs.EXPORT_FAILED)
+
+    @override_settings(DATATABLES_EXPORT_DIR=tempfile.mkdtemp())
+    def test_cleanup_exports(self):
+        old = jobs.ExportJob.create('csv', 'old.csv')
+        open(old.path, 'w').close()
+        new = jobs.ExportJob.create('csv', 'new.csv')
+        for path in (old.path, old.state_path(old.id)):
+            os.utime(path, (0, 0))
+
+        jobs.cleanup_exports()
+        self.assertFalse(os.path.exists(old.path))
+        self.assertIsNone(jobs.ExportJob.load(old.id))
+        self.assertIsNotNone(jobs.ExportJob.load(new.id))
+
+
+class TestRawExport(TestCase):
+
+    def setUp(self):
+        self.employee = baker.make(
+            'sample.Employee', first_name='Emp', last_name='Raw',
+            birthday=datetime.date(1980, 1, 1), start_date=datetime.date(2000, 1, 1),
+        )
+
+    def render(self, table_class):
+        table = table_class()
+        return table.render_export_rows(list(
+            Employee.objects.values(*table.get_values_to_fetch())))
+
+    def test_raw_values(self):
+        self.assertEqual(self.render(RawExportDatatable), [
+            ['Emp', '<b>Raw</b>', 1980, None, 'x'],
+        ])
+        self.assertEqual(self.render(EmployeeListDatatable), [
+            ['Emp Raw', datetime.date(1980, 1, 1), datetime.date(2000, 1, 1), None],
+        ])
+
+    def test_rendered_values(self):
+        class RenderedExportDatatable(RawExportDatatable):
+            class Meta:
+                export_raw = False
+
+        row = self.render(RenderedExportDatatable)[0]
+        self.assertIn('<a href', row[0])
+        self.assertEqual(row[2:], ['1980-01-01', '<i class="fas fa-user"></i>', 'x'])
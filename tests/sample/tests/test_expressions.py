@@ -0,0 +1,51 @@
+from django.db.models import Value
+from django.db.models.functions import Concat, ExtractYear
+from django.test import TestCase
+
+from model_bakery import baker
+
+from django_datatables import column, datatable
+from sample.models import Employee
+from sample.tests.utils import draw
+
+
+class ExpressionDatatable(datatable.Datatable):
+    full_name = column.ExpressionColumn(Concat('first_name', Value(' '), 'last_name'))
+    birth_year = column.ExpressionColumn(ExtractYear('birthday'), search_lookup='exact')
+
+    class Meta:
+        model = Employee
+        searching = True
+        search_fields = ['full_name']
+
+
+class TestExpressionColumns(TestCase):
+
+    def setUp(self):
+        for first, last, birthday in [
+                ('Grace', 'Hopper', '1906-12-09'), ('Ada', 'Lovelace', '1815-12-10'),
+                ('Alan', 'Turing', '1912-06-23')]:
+            baker.make('sample.Employee', first_name=first, last_name=last, birthday=birthday)
+
+    def test_ordering(self):
+        response = draw(ExpressionDatatable, **{'order[0][column]': 0, 'order[0][dir]': 'desc'})
+        self.assertEqual(response['data'], [
+            ['Grace Hopper', 1906], ['Alan Turing', 1912], ['Ada Lovelace', 1815]])
+        response = draw(ExpressionDatatable, **{'order[0][column]': 1, 'order[0][dir]': 'asc'})
+        self.assertEqual([row[0] for row in response['data']],
+                         ['Ada Lovelace', 'Grace Hopper', 'Alan Turing'])
+
+    def test_search(self):
+        response = draw(ExpressionDatatable, **{'search[value]': 'n tu'})
+        self.assertEqual(response['data'], [['Alan Turing', 1912]])
+        self.assertEqual(response['recordsTotal'], 3)
+        self.assertEqual(response['recordsFiltered'], 1)
+
+        response = draw(ExpressionDatatable, **{'columns[1][search][value]': '1815'})
+        self.assertEqual(response['data'], [['Ada Lovelace', 1815]])
+
+    def test_column_search_matches_prefixes(self):
+        response = draw(ExpressionDatatable, **{'columns[0][search][value]': 'ala'})
+        self.assertEqual(response['data'], [['Alan Turing', 1912]])
+        response = draw(ExpressionDatatable, **{'columns[0][search][value]': 'turing'})
+        self.assertEqual(response['data'], [])
@@ -0,0 +1,47 @@
+from django.test import RequestFactory, TestCase
+
+from model_bakery import baker
+
+from django_datatables.instrumentation import NullCapture, get_query_capture
+from django_datatables.signals import slow_query
+from sample.views_sample import EmployeeListDatatable
+
+
+class SlowEmployeeListDatatable(EmployeeListDatatable):
+
+    class Meta:
+        slow_query_threshold = 0
+        slow_query_analyze = True
+
+
+class TestSlowQueryCapture(TestCase):
+
+    def setUp(self):
+        baker.make('sample.Employee', last_name='Smith', _quantity=3)
+        self.reports = []
+        slow_query.connect(self.receive, sender=SlowEmployeeListDatatable)
+        self.addCleanup(slow_query.disconnect, self.receive, sender=SlowEmployeeListDatatable)
+
+    def receive(self, sender, **kwargs):
+        self.reports.append(kwargs)
+
+    def test_disabled(self):
+        self.assertIsInstance(get_query_capture(EmployeeListDatatable()), NullCapture)
+        self.assertFalse(get_query_capture(EmployeeListDatatable()).enabled)
+
+    def test_reports_queries_by_phase(self):
+        request = RequestFactory().get('/', {'draw': 1, 'additional_data': 'last_name=Smith'})
+        datatable = SlowEmployeeListDatatable()
+        datatable.request = request
+        with self.assertLogs('django_datatables.instrumentation', 'WARNING'):
+            data = datatable.get_context_data(request)
+
+        self.assertNotIn('error', data)
+        self.assertEqual(
+            sorted(report['phase'] for report in self.reports),
+            ['count_filtered', 'count_total', 'page'])
+        page = [report for report in self.reports if report['phase'] == 'page'][0]
+        self.assertIs(page['datatable'], datatable)
+        self.assertIn('sample_employee', page['sql'])
+        # SQLite has no EXPLAIN ANALYZE and falls back to EXPLAIN QUERY PLAN
+        self.assertIn('SCAN', page['plan'])
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import path, re_path, reverse, set_script_prefix
+
+from django_datatables import links
+from sample.views_sample import employee_detail
+
+urlpatterns = [
+    path('employee/<int:pk>/', employee_detail, name='detail'),
+    path('team/<str:team>/<int:pk>/', employee_detail, name='team_detail'),
+    path('file/<path:name>', employee_detail, name='file'),
+    re_path(r'^year/(?P<year>[0-9]{4})/$', employee_detail, name='year'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestLinkUrls(SimpleTestCase):
+
+    def setUp(self):
+        links._templates.clear()
+        links.cached_reverse.cache_clear()
+
+    def assertLinks(self, viewname, *args_list):
+        for args in args_list:
+            self.assertEqual(links.link_url(viewname, args), reverse(viewname, args=args))
+
+    def test_templated(self):
+        self.assertLinks('detail', [1], [42])
+        self.assertLinks('team_detail', ['a b&c', 7], ['ünï', 8])
+        key = ('detail', 1, __name__, '/')
+        self.assertEqual(links._templates[key], ['/employee/', 0, '/'])
+        # The template is checked against reverse once, then used as is
+        self.assertEqual(links.cached_reverse.cache_info().currsize, 2)
+
+    def test_fallback(self):
+        self.assertLinks('year', [1999], [2024])
+        self.assertIsNone(links._templates[('year', 1, __name__, '/')])
+        self.assertLinks('file', ['a/b.txt'], ['c.txt'], ['d/e.txt'])
+
+    def test_script_prefix(self):
+        self.assertLinks('detail', [1])
+        set_script_prefix('/app/')
+        try:
+            self.assertEqual(links.link_url('detail', [2]), '/app/employee/2/')
+        finally:
+            set_script_prefix('/')
@@ -0,0 +1,82 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+
+from model_bakery import baker
+
+from sample.models import Employee
+from sample.views_sample import KeysetEmployeeListDatatable
+
+
+class TestKeysetPagination(TestCase):
+
+    def setUp(self):
+        # Shared birthdays make the pk tiebreaker matter
+        for i in range(7):
+            baker.make(
+                'sample.Employee',
+                birthday=datetime.date(1980, 1, 1 + i // 3),
+                start_date=datetime.date(2000, 1, 1),
+            )
+
+    def get_page(self, start, cursor=None, direction='asc', column=1):
+        params = {
+            'table': KeysetEmployeeListDatatable._meta.datatable_id,
+            'draw': 1,
+            'start': start,
+            'length': 3,
+            'order[0][column]': column,
+            'order[0][dir]': direction,
+        }
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(reverse('django_datatables:datatable_manager'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_pages_match_offset_pages(self):
+        for direction in ('asc', 'desc'):
+            first = self.get_page(0, direction=direction)
+            self.assertEqual(first['recordsFiltered'], 7)
+            self.assertNotIn('prevCursor', first)
+
+            second = self.get_page(3, first['nextCursor'], direction=direction)
+            self.assertEqual(second['data'], self.get_page(3, direction=direction)['data'])
+
+            third = self.get_page(6, second['nextCursor'], direction=direction)
+            self.assertEqual(len(third['data']), 1)
+            self.assertNotIn('nextCursor', third)
+
+            back = self.get_page(3, third['prevCursor'], direction=direction)
+            self.assertEqual(back['data'], second['data'])
+
+    def test_cursor_for_other_ordering_is_ignored(self):
+        first = self.get_page(0)
+        page = self.get_page(3, first['nextCursor'], direction='desc')
+        self.assertEqual(page['data'], self.get_page(3, direction='desc')['data'])
+
+    def test_cursor_pages_with_null_sort_values(self):
+        # Sorting on manager__last_name: three NULLs and two shared names
+        employees = list(Employee.objects.order_by('pk'))
+        for employee, manager in zip(employees[3:], [0, 1, 0, 2]):
+            employees[manager].last_name = 'Same' if manager < 2 else 'Other'
+            employees[manager].save()
+            employee.manager = employees[manager]
+            employee.save()
+
+        for direction in ('asc', 'desc'):
+            pages = [self.get_page(start, direction=direction, column=3)['data']
+                     for start in (0, 3, 6)]
+            self.assertEqual(sum(len(page) for page in pages), 7)
+
+            first = self.get_page(0, direction=direction, column=3)
+            second = self.get_page(3, first['nextCursor'], direction=direction, column=3)
+            self.assertEqual(second['data'], pages[1])
+            third = self.get_page(6, second['nextCursor'], direction=direction, column=3)
+            self.assertEqual(third['data'], pages[2])
+
+            back = self.get_page(3, third['prevCursor'], direction=direction, column=3)
+            self.assertEqual(back['data'], pages[1])
+            back = self.get_page(0, back['prevCursor'], direction=direction, column=3)
+            self.assertEqual(back['data'], pages[0])
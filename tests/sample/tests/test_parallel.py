@@ -0,0 +1,68 @@
+import threading
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+
+from model_bakery import baker
+
+from django_datatables import parallel
+from django_datatables.parallel import can_run_in_parallel, run_queries
+from sample.views_sample import EmployeeListDatatable
+
+
+class ParallelEmployeeListDatatable(EmployeeListDatatable):
+
+    class Meta:
+        parallel_queries = True
+
+
+def current_thread(arg):
+    return arg, threading.get_ident()
+
+
+def fail(arg):
+    raise ValueError(arg)
+
+
+class TestRunQueries(SimpleTestCase):
+
+    def test_runs_calls_in_threads(self):
+        results = run_queries([(current_thread, 'a'), (current_thread, 'b'), (current_thread, 'c')])
+        self.assertEqual([arg for arg, thread in results], ['a', 'b', 'c'])
+        self.assertEqual(results[0][1], threading.get_ident())
+        self.assertNotIn(threading.get_ident(), [thread for arg, thread in results[1:]])
+
+    def test_serial(self):
+        results = run_queries([(current_thread, 'a'), (current_thread, 'b')], parallel=False)
+        self.assertEqual({thread for arg, thread in results}, {threading.get_ident()})
+
+    def test_raises_worker_errors(self):
+        with self.assertRaisesMessage(ValueError, 'b'):
+            run_queries([(current_thread, 'a'), (fail, 'b')])
+
+
+class TestParallelQueries(TestCase):
+
+    def test_serial_in_transaction(self):
+        self.assertFalse(can_run_in_parallel(DEFAULT_DB_ALIAS))
+
+
+class TestParallelDraw(TransactionTestCase):
+    """ Committed rows, visible to the worker connections """
+
+    # The shared cache in-memory test database is seen by every connection
+    @mock.patch('django_datatables.datatable.can_run_in_parallel', return_value=True)
+    def test_same_response(self, can_run):
+        baker.make('sample.Employee', last_name='Smith', _quantity=3)
+        request = RequestFactory().get('/', {'draw': 1, 'length': 2})
+        responses = []
+        with mock.patch.object(parallel, 'run_query', wraps=parallel.run_query) as run_query:
+            for datatable_class in (EmployeeListDatatable, ParallelEmployeeListDatatable):
+                datatable = datatable_class()
+                datatable.request = request
+                responses.append(datatable.get_context_data(request))
+        # The filtered count and the page query ran in workers
+        self.assertEqual(run_query.call_count, 2)
+        self.assertNotIn('error', responses[1])
+        self.assertEqual(responses[0], responses[1])
@@ -0,0 +1,50 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from model_bakery import baker
+
+from django_datatables import column
+from sample.tests.utils import draw
+from sample.views_sample import EmployeeListDatatable
+
+
+class UndeclaredEmployeeListDatatable(EmployeeListDatatable):
+    reports_to = column.StringColumn()
+
+    def render_reports_to(self, row):
+        return row['manager__last_name']
+
+
+def get_context_data(datatable_class, hidden):
+    params = {'columns[{0}][visible]'.format(index): 'false' for index in hidden}
+    with CaptureQueriesContext(connection) as captured:
+        data = draw(datatable_class, **params)
+    page_sql = [query['sql'] for query in captured if 'COUNT(' not in query['sql']]
+    return data, page_sql[0]
+
+
+class TestColumnProjection(TestCase):
+
+    def setUp(self):
+        manager = baker.make('sample.Employee', first_name='Ada', last_name='King')
+        baker.make('sample.Employee', first_name='Alan', last_name='Turing', manager=manager)
+
+    def test_hidden_columns_are_not_fetched(self):
+        data, sql = get_context_data(EmployeeListDatatable, hidden=[0, 3])
+        self.assertEqual([row[0] for row in data['data']], [None, None])
+        self.assertEqual([row[3] for row in data['data']], [None, None])
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('first_name', sql)
+
+    def test_visible_columns_fetch_dependencies(self):
+        data, sql = get_context_data(EmployeeListDatatable, hidden=[])
+        self.assertIn('JOIN', sql)
+        self.assertEqual(
+            sorted(row[0] for row in data['data']), ['Ada King', 'Alan Turing'])
+
+    def test_undeclared_render_method_fetches_every_column(self):
+        data, sql = get_context_data(UndeclaredEmployeeListDatatable, hidden=[3])
+        self.assertIn('JOIN', sql)
+        self.assertEqual(sorted(row[4] or '' for row in data['data']), ['', 'King'])
+        self.assertEqual([row[3] for row in data['data']], [None, None])
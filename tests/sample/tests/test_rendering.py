@@ -0,0 +1,86 @@
+import datetime
+
+from django.test import RequestFactory, TestCase
+
+from model_bakery import baker
+
+from django_datatables import column, datatable
+from sample.models import Employee
+
+
+class RenderedDatatable(datatable.Datatable):
+    name = column.StringColumn()
+    last_name = column.TextColumn(link='employee_list')
+    birthday = column.DateColumn()
+    edit = column.ConstantTextColumn('Edit', link='employee_list')
+    selected = column.CheckBoxColumn(name='pk', value='id')
+
+    def render_name(self, row):
+        return "{} {}".format(row['first_name'], row['last_name'])
+
+    def render_last_name(self, value):
+        return value.upper()
+
+    class Meta:
+        model = Employee
+        extra_fields = ('first_name',)
+
+
+class UpperColumn(column.Column):
+
+    def render_batch(self, values, rows):
+        self.batches.append(values)
+        return [value.upper() for value in values]
+
+
+class DayColumn(column.DateColumn):
+
+    def render_column(self, value):
+        return value.day
+
+
+class BatchDatatable(datatable.Datatable):
+    first_name = UpperColumn()
+    last_name = UpperColumn(link='employee_detail', link_args=['id'])
+    birthday = DayColumn()
+
+    def render_first_name(self, value):
+        return value + '!'
+
+    class Meta:
+        model = Employee
+
+
+class TestRendering(TestCase):
+
+    def test_render_plan(self):
+        employee = baker.make(
+            'sample.Employee', first_name='Ada', last_name='King',
+            birthday=datetime.date(1815, 12, 10))
+        request = RequestFactory().get('/', {'draw': 1})
+        table = RenderedDatatable()
+        table.request = request
+        data = table.get_context_data(request)['data']
+
+        self.assertEqual(data, [[
+            'Ada King',
+            '<a href="/">KING</a>',
+            '1815-12-10',
+            '<a href="/">Edit</a>',
+            '<input id="???" type="checkbox" name="pk" value="{}"></>'.format(employee.pk),
+        ]])
+
+    def test_render_batch(self):
+        for name in ('Ada', 'Alan'):
+            baker.make('sample.Employee', first_name=name, last_name='King',
+                       birthday=datetime.date(1815, 12, 10))
+        UpperColumn.batches = []
+        table = BatchDatatable()
+        rows = list(Employee.objects.order_by('pk').values(*table.get_values_to_fetch()))
+        data = table.render_rows(rows)
+
+        self.assertEqual(UpperColumn.batches, [['Ada', 'Alan'], ['King', 'King']])
+        self.assertEqual([row[0] for row in data], ['ADA!', 'ALAN!'])
+        self.assertEqual(data[0][1], '<a href="/employee/{}/">KING</a>'.format(rows[0]['id']))
+        # DateColumn's render_batch is not used by a subclass changing render_column
+        self.assertEqual([row[2] for row in data], [10, 10])
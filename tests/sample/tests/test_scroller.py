@@ -0,0 +1,73 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from model_bakery import baker
+
+from sample.models import Employee
+from sample.tests.utils import draw, get_table
+from sample.views_sample import EmployeeListDatatable
+
+
+class ScrollerEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        pagination = 'scroller'
+        scroller_block_size = 10
+        order_columns = ['birthday']
+
+
+class OffsetEmployeeDatatable(EmployeeListDatatable):
+
+    class Meta:
+        order_columns = ['birthday']
+
+
+# By birthday, which several rows share
+ORDER = {'order[0][column]': 1, 'order[0][dir]': 'desc'}
+
+
+class TestScroller(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for i in range(25):
+            baker.make('sample.Employee', first_name='Emp', last_name=str(i),
+                       birthday=datetime.date(1980, 1, 1) + datetime.timedelta(days=i % 7))
+
+    def test_pages_match_offset_pages(self):
+        for start, length in [(0, 10), (5, 10), (18, 10), (24, 5)]:
+            response = draw(ScrollerEmployeeDatatable, start=start, length=length, **ORDER)
+            expected = draw(OffsetEmployeeDatatable, start=start, length=length, **ORDER)
+            self.assertEqual(response['recordsTotal'], 25)
+            self.assertEqual(response['recordsFiltered'], 25)
+            self.assertEqual(len(response['data']), min(length, 25 - start))
+            # Rows sharing a birthday are ordered by primary key by the scroller only
+            self.assertEqual([row[1] for row in response['data']],
+                             [row[1] for row in expected['data']])
+
+    def test_cached_blocks(self):
+        draw(ScrollerEmployeeDatatable, start=0, length=15, **ORDER)
+        # The counts and both blocks are cached, only the page rows are queried
+        with self.assertNumQueries(1):
+            draw(ScrollerEmployeeDatatable, start=3, length=15, **ORDER)
+        # Another search is another set of blocks
+        with self.assertNumQueries(4):
+            draw(ScrollerEmployeeDatatable, start=0, length=5, **{'search[value]': 'x'}, **ORDER)
+
+        # Saving an instance retires the blocks
+        Employee.objects.first().save()
+        with self.assertNumQueries(5):
+            draw(ScrollerEmployeeDatatable, start=3, length=15, **ORDER)
+
+    def test_prefetch(self):
+        table = get_table(ScrollerEmployeeDatatable, start=0, length=5, **ORDER)
+        table.get_context_data(table.request)
+        table.scroller.prefetch([1, 2, 3])
+        self.assertEqual(len(cache.get(table.scroller.key(1))), 10)
+        self.assertEqual(len(cache.get(table.scroller.key(2))), 5)
+        # The last block is short, there is nothing after it
+        self.assertIsNone(cache.get(table.scroller.key(3)))
+        with self.assertNumQueries(1):
+            draw(ScrollerEmployeeDatatable, start=12, length=10, **ORDER)
@@ -0,0 +1,131 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from model_bakery import baker
+
+from django_datatables import column, datatable
+from sample.tests.utils import draw
+from sample.views_sample import EmployeeListDatatable
+
+
+class LookupSearchDatatable(EmployeeListDatatable):
+
+    class Meta:
+        search_fields = ['first_name', 'last_name__istartswith']
+
+
+class FTS5SearchDatatable(EmployeeListDatatable):
+
+    class Meta:
+        search_fields = ['first_name', 'last_name']
+        search_backend = 'fts5'
+
+
+class FirstNameFTS5SearchDatatable(EmployeeListDatatable):
+
+    class Meta:
+        search_fields = ['first_name']
+        search_backend = 'fts5'
+
+
+class RankedFTS5SearchDatatable(FTS5SearchDatatable):
+
+    class Meta:
+        search_rank = True
+
+
+class ColumnSearchDatatable(EmployeeListDatatable):
+    first_name = column.TextColumn(choices=[('Ada', 'Ada'), ('Alan', 'Alan')])
+    last_name = column.TextColumn(search_min_length=2)
+
+
+class DateJoinedDatatable(datatable.Datatable):
+    username = column.TextColumn()
+    date_joined = column.DateColumn()
+
+    class Meta:
+        model = User
+
+
+def search(datatable_class, value, **params):
+    params.update({'search[value]': value, 'order[0][column]': 1, 'order[0][dir]': 'asc'})
+    return [row[0] for row in draw(datatable_class, **params)['data']]
+
+
+class SearchTestCase(TestCase):
+
+    def setUp(self):
+        for i, (first, last) in enumerate([
+                ('Ada', 'Lovelace'), ('Grace', 'Hopper'), ('Alan', 'Turing'),
+                ('Adam', 'Smith Adams')]):
+            baker.make('sample.Employee', first_name=first, last_name=last,
+                       birthday='1990-01-0{}'.format(i + 1))
+
+
+class TestSearchBackends(SearchTestCase):
+
+    def test_lookup(self):
+        self.assertEqual(search(LookupSearchDatatable, 'ra'), ['Grace Hopper'])
+        self.assertEqual(search(LookupSearchDatatable, 'Tu'), ['Alan Turing'])
+        self.assertEqual(search(LookupSearchDatatable, 'xyz'), [])
+
+    def test_fts5(self):
+        self.assertEqual(search(FTS5SearchDatatable, 'ada'), ['Ada Lovelace', 'Adam Smith Adams'])
+        self.assertEqual(search(FTS5SearchDatatable, 'smith ada'), ['Adam Smith Adams'])
+        # Query syntax is taken literally
+        self.assertEqual(search(FTS5SearchDatatable, '"OR'), [])
+
+        from sample.models import Employee
+        Employee.objects.filter(first_name='Ada').delete()
+        self.assertEqual(search(FTS5SearchDatatable, 'ada'), ['Adam Smith Adams'])
+
+    def test_fts5_tables_per_search_fields(self):
+        self.assertEqual(search(FirstNameFTS5SearchDatatable, 'smith'), [])
+        self.assertEqual(
+            search(FirstNameFTS5SearchDatatable, 'ada'), ['Ada Lovelace', 'Adam Smith Adams'])
+        self.assertEqual(search(FTS5SearchDatatable, 'smith'), ['Adam Smith Adams'])
+
+    def test_fts5_table_created_once(self):
+        with CaptureQueriesContext(connection) as captured:
+            search(FTS5SearchDatatable, 'ada')
+        self.assertFalse([q for q in captured if 'CREATE VIRTUAL TABLE' in q['sql']])
+
+    def test_fts5_ranked(self):
+        self.assertEqual(
+            search(RankedFTS5SearchDatatable, 'ada'), ['Adam Smith Adams', 'Ada Lovelace'])
+
+
+class TestColumnSearch(SearchTestCase):
+
+    def column_search(self, **searches):
+        params = {}
+        for index, value in searches.items():
+            params['columns[{}][search][value]'.format(index[1:])] = value
+        return search(ColumnSearchDatatable, '', **params)
+
+    def test_date_range(self):
+        self.assertEqual(self.column_search(c1='1990-01-02|1990-01-03'),
+                         ['Grace Hopper', 'Alan Turing'])
+        self.assertEqual(self.column_search(c1='1990-01-03|'), ['Alan Turing', 'Adam Smith Adams'])
+        self.assertEqual(self.column_search(c1='1990-01-04'), ['Adam Smith Adams'])
+        self.assertEqual(len(self.column_search(c1='1990-02-30')), 4)
+
+    def test_datetime_by_date(self):
+        for day, username in ((1, 'ada'), (2, 'grace'), (3, 'alan')):
+            baker.make(User, username=username, date_joined=datetime.datetime(
+                2020, 1, day, 15, tzinfo=datetime.timezone.utc))
+        params = {'columns[1][search][value]': '2020-01-01|2020-01-02'}
+        self.assertEqual(search(DateJoinedDatatable, '', **params), ['ada', 'grace'])
+        params = {'columns[1][search][value]': '2020-01-03'}
+        self.assertEqual(search(DateJoinedDatatable, '', **params), ['alan'])
+
+    def test_text_prefix_and_choices(self):
+        self.assertEqual(self.column_search(c5='tu'), ['Alan Turing'])
+        # Below the column's search_min_length
+        self.assertEqual(len(self.column_search(c5='t')), 4)
+        self.assertEqual(self.column_search(c4='Ada', c5='lo'), ['Ada Lovelace'])
+        self.assertEqual(len(self.column_search(c4='Grace')), 4)
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import uuid
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.functional import lazy
+from django.utils.safestring import mark_safe
+
+from django_datatables.serializers import (
+    DjangoJSONSerializer, OrjsonSerializer, convert_rows, get_serializer, orjson,
+)
+
+lazy_str = lazy(lambda: 'Lazy', str)
+
+
+def get_response():
+    return {'draw': 1, 'data': [
+        ['a', date(2020, 1, 2), Decimal('1.50'), lazy_str(), mark_safe('<b>b</b>'), 1, None],
+        ['b', None, Decimal('2'), 'c', 'd', 2.5,
+         datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)],
+    ]}
+
+
+class TestSerializers(SimpleTestCase):
+
+    def test_convert_rows(self):
+        rows = convert_rows(get_response()['data'])
+        self.assertEqual(rows[0], ['a', '2020-01-02', '1.50', 'Lazy', '<b>b</b>', 1, None])
+        self.assertEqual(rows[1][6], '2020-01-02T03:04:05.678Z')
+
+    def test_list_and_dict_cells(self):
+        data = [[['a', 1], {'b': None}, 'c'], [[], {}, 'd']]
+        response = {'draw': 1, 'data': [list(row) for row in data]}
+        self.assertEqual(json.loads(DjangoJSONSerializer().dumps_response(response))['data'], data)
+        if orjson is not None:
+            response = {'draw': 1, 'data': [list(row) for row in data]}
+            self.assertEqual(json.loads(OrjsonSerializer().dumps_response(response))['data'], data)
+
+    def test_backends_agree(self):
+        expected = json.loads(DjangoJSONSerializer().dumps_response(get_response()))
+        self.assertEqual(expected['data'][0][1], '2020-01-02')
+        if orjson is not None:
+            self.assertEqual(json.loads(OrjsonSerializer().dumps_response(get_response())), expected)
+
+    def test_encodes_other_values(self):
+        value = uuid.uuid4()
+        self.assertEqual(
+            json.loads(DjangoJSONSerializer().dumps({'job': value, 'label': lazy_str()})),
+            {'job': str(value), 'label': 'Lazy'})
+
+    def test_setting(self):
+        with override_settings(DATATABLES_JSON_SERIALIZER='django'):
+            self.assertIsInstance(get_serializer(), DjangoJSONSerializer)
+        with override_settings(
+                DATATABLES_JSON_SERIALIZER='django_datatables.serializers.DjangoJSONSerializer'):
+            self.assertIsInstance(get_serializer(), DjangoJSONSerializer)
+        expected = OrjsonSerializer if orjson is not None else DjangoJSONSerializer
+        self.assertIsInstance(get_serializer(), expected)
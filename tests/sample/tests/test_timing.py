@@ -0,0 +1,49 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from model_bakery import baker
+
+from django_datatables.signals import datatable_timed
+from sample.views_sample import EmployeeListDatatable
+
+
+class TimedEmployeeListDatatable(EmployeeListDatatable):
+
+    class Meta:
+        timing = True
+
+
+class TestTiming(TestCase):
+
+    def setUp(self):
+        baker.make('sample.Employee', _quantity=3)
+        self.timed = []
+        datatable_timed.connect(self.receive)
+        self.addCleanup(datatable_timed.disconnect, self.receive)
+
+    def receive(self, sender, **kwargs):
+        self.timed.append((sender, kwargs))
+
+    def get(self, datatable_class):
+        return self.client.get(reverse('django_datatables:datatable_manager'), {
+            'table': datatable_class._meta.datatable_id, 'draw': 1, 'search[value]': 'x'})
+
+    def test_server_timing_header(self):
+        response = self.get(TimedEmployeeListDatatable)
+        phases = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(sorted(phases), sorted([
+            'initial', 'search', 'filter', 'count_total', 'count_filtered', 'page', 'render',
+            'serialize']))
+        self.assertIn(';dur=', response['Server-Timing'])
+
+    def test_signal(self):
+        self.get(TimedEmployeeListDatatable)
+        sender, kwargs = self.timed[0]
+        self.assertIs(sender, TimedEmployeeListDatatable)
+        self.assertEqual(kwargs['name'], 'TimedEmployeeListDatatable')
+        self.assertIn('render', kwargs['timings'])
+
+    def test_disabled(self):
+        response = self.get(EmployeeListDatatable)
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.timed, [])
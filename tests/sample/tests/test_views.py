@@ -81,3 +81,15 @@ class TestViews(TestCase):
         # Should be have somethin'
         datatable = self.get_datatable(response)
         self.assertEqual(datatable['recordsTotal'], 3)
+
+    def test_unregistered_datatable(self):
+        url = reverse('django_datatables:datatable_manager')
+        self.assertEqual(self.client.get(url, {'table': 'os.path'}).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_autodiscovered_datatable(self):
+        baker.make('sample.Employee', _quantity=2)
+        url = reverse('django_datatables:datatable_manager')
+        response = self.client.get(url, {'table': 'managers', 'draw': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['recordsTotal'], 2)
@@ -0,0 +1,30 @@
+"""
+Helpers shared by the tests
+"""
+
+from django.test import RequestFactory
+
+
+def get_table(datatable_class, **params):
+    """ Returns a datatable_class bound to a draw request with params """
+    params.setdefault('draw', 1)
+    request = RequestFactory().get('/', params)
+    table = datatable_class()
+    table.request = request
+    return table
+
+
+def draw(datatable_class, **params):
+    """ Returns the data response of datatable_class to a draw request with params """
+    table = get_table(datatable_class, **params)
+    response = table.get_context_data(table.request)
+    assert 'error' not in response, response['error']
+    return response
+
+
+async def adraw(datatable_class, **params):
+    """ The async counterpart of draw, for AsyncDatatable classes """
+    table = get_table(datatable_class, **params)
+    response = await table.aget_context_data(table.request)
+    assert 'error' not in response, response['error']
+    return response
@@ -1,4 +1,5 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render
 
 from .models import Employee
 from .forms import EmployeeFilterForm
@@ -13,6 +14,7 @@ class EmployeeListDatatable(datatable.Datatable):
     start_date = column.DateColumn()
     manager = column.TextColumn(value='manager__last_name')
 
+    @datatable.depends_on('first_name', 'last_name')
     def render_name(self, row):
         return "{} {}".format(row['first_name'], row['last_name']).strip()
 
@@ -20,14 +22,19 @@ class EmployeeListDatatable(datatable.Datatable):
         model = Employee
         filter_form = EmployeeFilterForm
 
-        extra_fields = ('first_name', 'last_name')
-
 
 class SecureEmployeeListDatatable(LoginRequiredMixin, EmployeeListDatatable):
     def get_initial_queryset(self, request):
         return Employee.objects.all()
 
 
+class KeysetEmployeeListDatatable(EmployeeListDatatable):
+
+    class Meta:
+        order_columns = ['birthday', 'start_date']
+        pagination = 'keyset'
+
+
 def employee_list(request):
     datatable = EmployeeListDatatable()
     return render(request, 'main.html',
@@ -42,3 +49,8 @@ def secure_employee_list(request):
     return render(request, 'main.html',
         {"datatable": datatable}
     )
+
+
+def employee_detail(request, pk):
+    employee = get_object_or_404(Employee, pk=pk)
+    return HttpResponse("{} {}".format(employee.first_name, employee.last_name))